@@ -0,0 +1,79 @@
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.urls import URLPattern
+from foodgram.middleware import render_timer
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+@functools.lru_cache(maxsize=None)
+def get_executor():
+    return ThreadPoolExecutor(
+        max_workers=settings.ASYNC_READ['THREADS'],
+        thread_name_prefix='async-read'
+    )
+
+
+def run_view(view, request, *args, **kwargs):
+    """
+    Выполняет синхронное представление и рендерит ответ в том же
+    потоке. Соединения с БД потока проверяются и закрываются по
+    правилам CONN_MAX_AGE, как это делают сигналы начала и конца запроса.
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if callable(getattr(response, 'render', None)):
+            with render_timer():
+                response = response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+def async_read_view(view):
+    """
+    Асинхронная обертка над представлением DRF для ASGI.
+    Под ASGI Django выполняет синхронные представления в одном общем
+    потоке, и медленный запрос к БД задерживает все остальные.
+    Обертка выполняет чтение в пуле из ASYNC_READ['THREADS'] потоков,
+    изменяющие запросы идут прежним путем.
+    """
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return await sync_to_async(run_view)(
+                view, request, *args, **kwargs
+            )
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            get_executor(),
+            functools.partial(
+                context.run, run_view, view, request, *args, **kwargs
+            )
+        )
+    return wrapper
+
+
+def async_read_patterns(patterns, names):
+    """
+    Заменяет представления маршрутов с именами из names
+    асинхронными обертками.
+    """
+    return [
+        URLPattern(
+            pattern.pattern,
+            async_read_view(pattern.callback),
+            pattern.default_args,
+            pattern.name
+        )
+        if isinstance(pattern, URLPattern) and pattern.name in names
+        else pattern
+        for pattern in patterns
+    ]
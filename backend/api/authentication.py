@@ -0,0 +1,112 @@
+import copy
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.translation import gettext_lazy as _
+from foodgram.metrics import record_cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+
+class ExpiringLRU:
+    """
+    Ограниченный по размеру LRU-кеш процесса с временем жизни записей.
+    """
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + timeout)
+            self.entries.move_to_end(key)
+            while len(self.entries) > settings.AUTH_TOKEN_CACHE['MAX_ENTRIES']:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+local_tokens = ExpiringLRU()
+
+
+@receiver(setting_changed)
+def reset_local_tokens(setting, **kwargs):
+    if setting == 'AUTH_TOKEN_CACHE':
+        local_tokens.clear()
+
+
+def get_cache_key(key):
+    return f'auth_token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+
+def invalidate_tokens(keys):
+    """
+    Сбрасывает записи токенов в кеше процесса и в общем кеше.
+    """
+    cache_keys = [get_cache_key(key) for key in keys]
+    for cache_key in cache_keys:
+        local_tokens.delete(cache_key)
+    cache.delete_many(cache_keys)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication без запроса к БД на каждый запрос:
+    пользователь токена берется из LRU процесса (короткое время жизни,
+    AUTH_TOKEN_CACHE['LOCAL_TIMEOUT']), затем из общего кеша Django
+    (AUTH_TOKEN_CACHE['TIMEOUT']) и только при промахе из таблицы
+    токенов. Записи сбрасываются сигналами при выходе (удаление
+    токена) и при сохранении пользователя, в том числе смене пароля;
+    в других процессах выход действует не позже чем через LOCAL_TIMEOUT.
+    Если кеш Django не общий (CACHE_SHARED), токен всегда проверяется
+    по БД: сброс в одном процессе не дошел бы до остальных.
+    Пользователь - копия из кеша, сохранять его нужно с update_fields.
+    """
+    def authenticate_credentials(self, key):
+        if not settings.CACHE_SHARED:
+            return self.get_token_user(key), key
+        cache_key = get_cache_key(key)
+        config = settings.AUTH_TOKEN_CACHE
+        user = local_tokens.get(cache_key)
+        if user is None:
+            user = cache.get(cache_key)
+            record_cache('auth_token', user is not None)
+            if user is None:
+                user = self.get_token_user(key)
+                cache.set(cache_key, user, config['TIMEOUT'])
+            local_tokens.set(cache_key, user, config['LOCAL_TIMEOUT'])
+        return copy.copy(user), key
+
+    def get_token_user(self, key):
+        try:
+            token = Token.objects.select_related('user').get(key=key)
+        except Token.DoesNotExist:
+            raise AuthenticationFailed(_('Invalid token.'))
+        if not token.user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return token.user
@@ -0,0 +1,251 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+from foodgram.metrics import record_cache
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import CacheVersion
+
+
+class LocalVersionStore:
+    """
+    Хранилище версий в памяти процесса, только для тестов:
+    другие процессы его изменений не видят, а после перезапуска
+    версии начинаются заново.
+    """
+    def __init__(self, **options):
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def get_version(self, name):
+        return self.versions.get(name, 0)
+
+    def bump(self, name):
+        with self.lock:
+            self.versions[name] = self.get_version(name) + 1
+            return self.versions[name]
+
+
+class DatabaseVersionStore:
+    """
+    Хранилище версий в таблице CacheVersion основной БД: общее для
+    всех процессов и переживает перезапуск. Используется, если Redis
+    не настроен; чтение версии - один запрос по первичному ключу.
+    """
+    def __init__(self, **options):
+        self.versions = CacheVersion.objects.using(DEFAULT_DB_ALIAS)
+
+    def get_version(self, name):
+        return self.versions.filter(name=name).values_list(
+            'version', flat=True
+        ).first() or 0
+
+    def bump(self, name):
+        with transaction.atomic(using=DEFAULT_DB_ALIAS):
+            self.versions.get_or_create(name=name)
+            self.versions.filter(name=name).update(version=F('version') + 1)
+            return self.get_version(name)
+
+
+class RedisVersionStore:
+    """
+    Хранилище версий в Redis (или совместимом сервере), общее
+    для всех процессов gunicorn.
+    """
+    def __init__(self, url, prefix='foodgram:reference:', **options):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get_version(self, name):
+        return int(self.client.get(self.prefix + name) or 0)
+
+    def bump(self, name):
+        return self.client.incr(self.prefix + name)
+
+
+class CachedVersionStore:
+    """
+    Версии хранилища store, закешированные в памяти процесса на
+    REFERENCE_CACHE['VERSION_TIMEOUT'] секунд, чтобы чтение из кеша
+    не требовало обращения к БД или Redis. Свои изменения процесс
+    видит сразу, изменения других процессов - не позже чем через
+    VERSION_TIMEOUT.
+    """
+    def __init__(self, store, timeout):
+        self.store = store
+        self.timeout = timeout
+        self.versions = {}
+        self.lock = threading.Lock()
+
+    def remember(self, name, version):
+        with self.lock:
+            self.versions[name] = (version, time.monotonic() + self.timeout)
+        return version
+
+    def get_version(self, name):
+        version, expires = self.versions.get(name, (None, 0))
+        if expires > time.monotonic():
+            return version
+        return self.remember(name, self.store.get_version(name))
+
+    def bump(self, name):
+        return self.remember(name, self.store.bump(name))
+
+    def clear(self):
+        with self.lock:
+            self.versions.clear()
+
+
+@lru_cache(maxsize=None)
+def get_version_store():
+    config = settings.REFERENCE_CACHE
+    return CachedVersionStore(
+        import_string(config['BACKEND'])(**config.get('OPTIONS', {})),
+        config.get('VERSION_TIMEOUT', 0)
+    )
+
+
+class PayloadCache:
+    """
+    Ограниченный по размеру LRU-кеш сериализованных ответов процесса.
+    Запись живет не дольше REFERENCE_CACHE['TIMEOUT'] секунд, даже
+    если версия модели не менялась.
+    """
+    def __init__(self):
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        config = settings.REFERENCE_CACHE
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + config['TIMEOUT'])
+            self.entries.move_to_end(key)
+            while len(self.entries) > config['MAX_ENTRIES']:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+payload_cache = PayloadCache()
+
+
+@receiver(setting_changed)
+def reset_reference_cache(setting, **kwargs):
+    if setting == 'REFERENCE_CACHE':
+        get_version_store.cache_clear()
+        payload_cache.clear()
+
+
+def get_cache_name(model):
+    return model._meta.label_lower
+
+
+def bump_version(model):
+    get_version_store().bump(get_cache_name(model))
+
+
+def etag_matches(header, etag):
+    """
+    Слабое сравнение ETag со списком из If-None-Match: префикс W/
+    не учитывается, * совпадает с любым.
+    """
+    for value in header.split(','):
+        value = value.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        if value in ('*', etag):
+            return True
+    return False
+
+
+def get_etag(data):
+    """
+    ETag по содержимому ответа: одинаковые данные дают одинаковый
+    ETag в любом процессе, разные - разный.
+    """
+    digest = hashlib.sha1(
+        json.dumps(data, ensure_ascii=False, default=str).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+class ReferenceCacheMixin:
+    """
+    Read-through кеш для list/retrieve справочников.
+    Ответ хранится в памяти процесса под ключом из версии модели и
+    параметров запроса. Версия меняется сигналами при изменении модели,
+    старые записи просто перестают использоваться. Клиент получает ETag
+    по содержимому ответа и при совпадении If-None-Match ответ 304
+    без тела.
+    """
+    def get_cache_key(self, request):
+        name = get_cache_name(self.get_queryset().model)
+        version = get_version_store().get_version(name)
+        params = '&'.join(
+            f'{key}={value}'
+            for key, values in sorted(request.query_params.lists())
+            for value in values
+        )
+        digest = hashlib.md5(
+            f'{self.action}:{self.kwargs}:{params}'.encode()
+        ).hexdigest()
+        return f'{name}:{version}:{digest}'
+
+    def cached_response(self, request, build_data):
+        key = self.get_cache_key(request)
+        entry = payload_cache.get(key)
+        record_cache('reference', entry is not None)
+        if entry is None:
+            data = build_data()
+            entry = (data, get_etag(data))
+            payload_cache.set(key, entry)
+        data, etag = entry
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            return Response(
+                status=status.HTTP_304_NOT_MODIFIED,
+                headers={'ETag': etag}
+            )
+        return Response(data, headers={'ETag': etag})
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: super(ReferenceCacheMixin, self).list(
+                request, *args, **kwargs
+            ).data
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            request,
+            lambda: super(ReferenceCacheMixin, self).retrieve(
+                request, *args, **kwargs
+            ).data
+        )
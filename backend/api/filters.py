@@ -1,5 +1,7 @@
 from django_filters.rest_framework import FilterSet, filters
-from recipes.models import Ingredient, Recipe
+from recipes.models import Ingredient, Recipe, Tag
+
+from .search import get_search_backend
 
 
 class IngredientFilter(FilterSet):
@@ -24,7 +26,12 @@ class RecipeFilter(FilterSet):
         method='get_is_in_shopping_cart'
     )
     author = filters.NumberFilter(field_name='author__id')
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.ModelMultipleChoiceFilter(
+        field_name='tags__slug',
+        to_field_name='slug',
+        queryset=Tag.objects.all()
+    )
+    search = filters.CharFilter(method='get_search')
 
     class Meta:
         model = Recipe
@@ -32,7 +39,8 @@ class RecipeFilter(FilterSet):
             'is_favorited',
             'is_in_shopping_cart',
             'author',
-            'tags'
+            'tags',
+            'search'
         )
 
     def get_is_favorited(self, *args, **kwargs):
@@ -58,3 +66,9 @@ class RecipeFilter(FilterSet):
                     purchase_recipe__user=self.request.user
                 )
         return self.queryset
+
+    def get_search(self, queryset, name, value):
+        """
+        Поиск по названию и описанию с ранжированием результатов.
+        """
+        return get_search_backend().search(queryset, value)
@@ -0,0 +1,63 @@
+import threading
+from bisect import bisect_left
+
+from recipes.models import Ingredient
+
+from .cache import get_cache_name, get_version_store
+
+
+class IngredientPrefixIndex:
+    """
+    Индекс названий ингредиентов для автодополнения.
+    Хранит отсортированный массив названий в casefold и ищет префикс
+    бинарным поиском. Строится при первом обращении и перестраивается,
+    когда меняется версия справочника ингредиентов.
+    """
+    def __init__(self):
+        self.version = None
+        self.index = ([], [])
+        self.lock = threading.Lock()
+
+    def build(self):
+        entries = sorted(
+            (name.casefold(), pk, name, measurement_unit)
+            for pk, name, measurement_unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).iterator()
+        )
+        return (
+            [entry[0] for entry in entries],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in entries
+            ]
+        )
+
+    def get_index(self):
+        version = get_version_store().get_version(get_cache_name(Ingredient))
+        if self.version != version:
+            with self.lock:
+                if self.version != version:
+                    self.index = self.build()
+                    self.version = version
+        return self.index
+
+    def search(self, prefix, limit=None):
+        """
+        Ингредиенты, название которых начинается с prefix (без учета
+        регистра). Точные совпадения идут первыми, затем остальные
+        по алфавиту.
+        """
+        keys, rows = self.get_index()
+        prefix = prefix.casefold()
+        result = []
+        position = bisect_left(keys, prefix)
+        while position < len(keys) and keys[position].startswith(prefix):
+            if limit is not None and len(result) >= limit:
+                break
+            result.append(rows[position])
+            position += 1
+        return result
+
+
+ingredient_index = IngredientPrefixIndex()
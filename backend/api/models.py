@@ -0,0 +1,26 @@
+from django.db import models
+
+
+class CacheVersion(models.Model):
+    """
+    Версия данных, по которой процессы сбрасывают свои кеши
+    (справочники, индексы в памяти). Используется, если Redis
+    не настроен.
+    """
+    name = models.CharField(
+        verbose_name='Имя',
+        max_length=100,
+        primary_key=True
+    )
+    version = models.PositiveBigIntegerField(
+        verbose_name='Версия',
+        default=0
+    )
+
+    class Meta:
+        verbose_name = 'Версия кеша'
+        verbose_name_plural = 'Версии кешей'
+        db_table = 'CacheVersion'
+
+    def __str__(self):
+        return f'{self.name}: {self.version}'
@@ -1,5 +1,15 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import connections
+from django.db.models import Q
 from foodgram.settings import PAGE_SIZE
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 
 class CustomPagination(PageNumberPagination):
@@ -9,3 +19,163 @@ class CustomPagination(PageNumberPagination):
     """
     page_size = PAGE_SIZE
     page_size_query_param = 'limit'
+
+
+class KeysetPagination(CustomPagination):
+    """
+    Пагинация на страницы с дополнительным режимом курсора.
+    Режим включается параметром cursor (пустым для первой страницы):
+    вместо OFFSET и COUNT(*) выборка продолжается от ключа последней
+    записи по полям view.cursor_ordering, что при составном индексе
+    по этим полям дает диапазонное сканирование индекса.
+    Параметр count=1 добавляет в ответ оценку количества записей.
+    Выборку с собственной сортировкой (поиск по релевантности) курсор
+    продолжить не может, такой запрос отклоняется.
+    """
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Неверный курсор.'
+    ordered_queryset_message = (
+        'Курсор нельзя сочетать с сортировкой по релевантности (search).'
+    )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        if queryset.query.order_by:
+            raise ValidationError(
+                {self.cursor_query_param: self.ordered_queryset_message}
+            )
+        self.request = request
+        self.ordering = view.cursor_ordering
+        self.ordering_model = queryset.model
+        self.limit = self.get_page_size(request)
+        values, self.reverse = self.decode_cursor(request)
+        self.count = (
+            self.estimate_count(queryset)
+            if request.query_params.get(self.count_query_param) == '1'
+            else None
+        )
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = [self.invert(field) for field in ordering]
+        if values is not None:
+            queryset = queryset.filter(self.get_keyset_filter(
+                ordering, values
+            ))
+        results = list(queryset.order_by(*ordering)[:self.limit + 1])
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.reverse:
+            results.reverse()
+        self.has_next = has_more if not self.reverse else True
+        self.has_previous = (
+            values is not None if not self.reverse else has_more
+        )
+        self.page_results = results
+        return results
+
+    @staticmethod
+    def invert(field):
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+    @staticmethod
+    def get_keyset_filter(ordering, values):
+        """
+        Условие "строго после ключа" для порядка ordering:
+        (a, b) после (x, y) <=> a > x OR (a = x AND b > y).
+        Избыточное a >= x задает границу диапазона для индекса.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(ordering, values):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        first = ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+    def get_key(self, obj):
+        return [
+            getattr(obj, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def encode_cursor(self, obj, reverse):
+        data = json.dumps({
+            'v': [
+                value.isoformat() if hasattr(value, 'isoformat') else value
+                for value in self.get_key(obj)
+            ],
+            'r': reverse
+        })
+        cursor = base64.urlsafe_b64encode(data.encode()).decode()
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            cursor
+        )
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            data = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            model = self.ordering_model
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, data['v'])
+            ]
+            return values, bool(data.get('r'))
+        except (ValueError, TypeError, KeyError, DjangoValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def estimate_count(self, queryset):
+        """
+        На PostgreSQL - оценка планировщика из EXPLAIN,
+        на остальных СУБД - точный COUNT(*).
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return queryset.count()
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]['Plan']['Plan Rows']
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page_results:
+            return None
+        return self.encode_cursor(self.page_results[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous:
+            return None
+        if not self.page_results:
+            return replace_query_param(
+                self.request.build_absolute_uri(), self.cursor_query_param, ''
+            )
+        return self.encode_cursor(self.page_results[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
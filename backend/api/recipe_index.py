@@ -0,0 +1,291 @@
+import threading
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from recipes.models import Recipe, RecipeIngredient
+
+from .cache import get_version_store
+
+INDEX_NAME = 'recipes.recipe_ingredients'
+
+
+class RecipeIngredientIndex:
+    """
+    Индекс рецептов по ингредиентам в памяти процесса: множества
+    ингредиентов и тегов каждого рецепта и обратные списки
+    ингредиент -> рецепты. Каждому рецепту выделена строка, по которой
+    сходство считается векторно в NumPy. Строится одним проходом по
+    RecipeIngredient при первом обращении. Изменения рецептов
+    публикуются в журнал (версия в хранилище версий, id рецептов
+    в кеше), и каждый процесс перечитывает только изменившиеся рецепты;
+    если журнал неполон, индекс строится заново.
+    """
+    def __init__(self):
+        self.version = None
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.ingredients = {}
+        self.tags = {}
+        self.postings = {}
+        self.arrays = {}
+        self.rows = {}
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.sizes = np.zeros(0, dtype=np.int32)
+
+    def build(self):
+        self.clear()
+        rows = RecipeIngredient.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        ).order_by().iterator()
+        ingredients = {}
+        for recipe_id, ingredient_id in rows:
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        tags = self.load_tags()
+        for recipe_id, recipe_ingredients in ingredients.items():
+            self.add(recipe_id, recipe_ingredients, tags.get(recipe_id, ()))
+
+    @staticmethod
+    def load_tags(recipe_ids=None):
+        rows = Recipe.tags.through.objects.order_by()
+        if recipe_ids is not None:
+            rows = rows.filter(recipe__in=recipe_ids)
+        tags = {}
+        for recipe_id, tag_id in rows.values_list('recipe_id', 'tag_id'):
+            tags.setdefault(recipe_id, set()).add(tag_id)
+        return tags
+
+    def get_row(self, recipe_id):
+        """
+        Строка рецепта; массивы строк растут удвоением.
+        """
+        row = self.rows.get(recipe_id)
+        if row is not None:
+            return row
+        row = len(self.rows)
+        if row >= len(self.ids):
+            capacity = max(2 * len(self.ids), 1024)
+            self.ids = np.resize(self.ids, capacity)
+            self.sizes = np.resize(self.sizes, capacity)
+            self.sizes[row:] = 0
+        self.rows[recipe_id] = row
+        self.ids[row] = recipe_id
+        return row
+
+    def add(self, recipe_id, ingredients, tags):
+        self.ingredients[recipe_id] = frozenset(ingredients)
+        self.tags[recipe_id] = frozenset(tags)
+        row = self.get_row(recipe_id)
+        self.sizes[row] = len(ingredients)
+        for ingredient_id in ingredients:
+            self.postings.setdefault(ingredient_id, set()).add(recipe_id)
+            self.arrays.pop(ingredient_id, None)
+
+    def remove(self, recipe_id):
+        for ingredient_id in self.ingredients.pop(recipe_id, ()):
+            recipes = self.postings[ingredient_id]
+            recipes.discard(recipe_id)
+            if not recipes:
+                del self.postings[ingredient_id]
+            self.arrays.pop(ingredient_id, None)
+        self.tags.pop(recipe_id, None)
+        if recipe_id in self.rows:
+            self.sizes[self.rows[recipe_id]] = 0
+
+    def get_array(self, ingredient_id):
+        """
+        Обратный список ингредиента в виде массива строк; собирается
+        при первом запросе после изменения.
+        """
+        array = self.arrays.get(ingredient_id)
+        if array is None:
+            array = np.fromiter(
+                (self.rows[recipe_id]
+                 for recipe_id in self.postings[ingredient_id]),
+                dtype=np.int64
+            )
+            self.arrays[ingredient_id] = array
+        return array
+
+    def refresh(self, recipe_ids):
+        """
+        Перечитывает из БД ингредиенты и теги рецептов recipe_ids;
+        удаленные рецепты убираются из индекса.
+        """
+        ingredients = {}
+        for recipe_id, ingredient_id in RecipeIngredient.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list('recipe_id', 'ingredient_id').order_by():
+            ingredients.setdefault(recipe_id, set()).add(ingredient_id)
+        tags = self.load_tags(recipe_ids)
+        for recipe_id in recipe_ids:
+            self.remove(recipe_id)
+            if recipe_id in ingredients:
+                self.add(
+                    recipe_id, ingredients[recipe_id], tags.get(recipe_id, ())
+                )
+
+    def get_changes(self, version):
+        """
+        id рецептов, измененных после self.version до version, или None,
+        если журнал изменений неполон.
+        """
+        if self.version is None or version < self.version:
+            return None
+        if version - self.version > settings.RECIPE_INDEX['MAX_CHANGES']:
+            return None
+        keys = [
+            get_change_key(number)
+            for number in range(self.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return {recipe_id for ids in changes.values() for recipe_id in ids}
+
+    def sync(self):
+        version = get_version_store().get_version(INDEX_NAME)
+        if self.version == version:
+            return
+        with self.lock:
+            if self.version == version:
+                return
+            changes = self.get_changes(version)
+            if changes is None:
+                self.build()
+            else:
+                self.refresh(changes)
+            self.version = version
+
+    def count_overlaps(self, ingredient_ids):
+        """
+        Число общих с ingredient_ids ингредиентов для каждой строки:
+        один bincount по объединенным обратным спискам.
+        """
+        arrays = [
+            self.get_array(ingredient_id)
+            for ingredient_id in ingredient_ids
+            if ingredient_id in self.postings
+        ]
+        if not arrays:
+            return np.zeros(len(self.rows), dtype=np.int64)
+        return np.bincount(np.concatenate(arrays), minlength=len(self.rows))
+
+    def take(self, candidates, order, tag_ids, limit):
+        """
+        id рецептов candidates в порядке order: только с одним из тегов
+        tag_ids (если заданы), не больше limit.
+        """
+        result = []
+        for position in order:
+            recipe_id = int(self.ids[candidates[position]])
+            if tag_ids and not self.tags[recipe_id] & tag_ids:
+                continue
+            result.append((position, recipe_id))
+            if len(result) == limit:
+                break
+        return result
+
+    def similar(self, recipe_id, tag_ids=None, limit=None):
+        """
+        Рецепты, больше всего пересекающиеся с recipe_id по ингредиентам,
+        в виде списка (id, коэффициент Жаккара) по убыванию сходства.
+        tag_ids оставляет рецепты хотя бы с одним из тегов.
+        """
+        self.sync()
+        with self.lock:
+            ingredients = self.ingredients.get(recipe_id)
+            if not ingredients:
+                return []
+            overlap = self.count_overlaps(ingredients)
+            overlap[self.rows[recipe_id]] = 0
+            candidates = np.flatnonzero(overlap)
+            scores = overlap[candidates] / (
+                len(ingredients) + self.sizes[candidates]
+                - overlap[candidates]
+            )
+            if not tag_ids and limit is not None and limit < len(scores):
+                # Равные limit-му значению оценки остаются все, иначе
+                # argpartition выбрал бы из них произвольные, а не по id.
+                border = -np.partition(-scores, limit - 1)[limit - 1]
+                top = scores >= border
+                candidates, scores = candidates[top], scores[top]
+            order = np.lexsort((-self.ids[candidates], -scores))
+            return [
+                (recipe_id, float(scores[position]))
+                for position, recipe_id in self.take(
+                    candidates, order, tag_ids, limit
+                )
+            ]
+
+    def pantry(self, ingredient_ids, max_missing=0, tag_ids=None,
+               limit=None):
+        """
+        Рецепты, которые можно приготовить из ingredient_ids, докупив
+        не больше max_missing ингредиентов: список (id, доля имеющихся
+        ингредиентов, id недостающих) по убыванию доли, затем
+        по возрастанию числа недостающих.
+        """
+        self.sync()
+        ingredient_ids = frozenset(ingredient_ids)
+        with self.lock:
+            have = self.count_overlaps(ingredient_ids)
+            sizes = self.sizes[:len(self.rows)]
+            candidates = np.flatnonzero(
+                (have > 0) & (sizes - have <= max_missing)
+            )
+            have, sizes = have[candidates], sizes[candidates]
+            coverage = have / sizes
+            order = np.lexsort(
+                (-self.ids[candidates], sizes - have, -coverage)
+            )
+            return [
+                (
+                    recipe_id,
+                    float(coverage[position]),
+                    sorted(self.ingredients[recipe_id] - ingredient_ids)
+                )
+                for position, recipe_id in self.take(
+                    candidates, order, tag_ids, limit
+                )
+            ]
+
+
+def get_change_key(version):
+    return f'recipe_index:changes:{version}'
+
+
+def publish_changes(recipe_ids):
+    version = get_version_store().bump(INDEX_NAME)
+    cache.set(
+        get_change_key(version),
+        sorted(recipe_ids),
+        settings.RECIPE_INDEX['CHANGES_TIMEOUT']
+    )
+
+
+pending = threading.local()
+
+
+def publish_pending():
+    recipe_ids = getattr(pending, 'recipe_ids', None)
+    pending.recipe_ids = set()
+    if recipe_ids:
+        publish_changes(recipe_ids)
+
+
+def recipe_changed(recipe_id):
+    """
+    Отмечает изменение ингредиентов или тегов рецепта. Изменения
+    одной транзакции публикуются одной записью после ее фиксации.
+    """
+    if not hasattr(pending, 'recipe_ids'):
+        pending.recipe_ids = set()
+    pending.recipe_ids.add(recipe_id)
+    transaction.on_commit(publish_pending)
+
+
+recipe_index = RecipeIngredientIndex()
@@ -0,0 +1,141 @@
+import csv
+import io
+import json
+
+from django.conf import settings
+from rest_framework import renderers
+
+
+class ShoppingListRenderer(renderers.BaseRenderer):
+    """
+    Базовый рендерер списка покупок.
+    Данные - последовательность кортежей (название, единица, количество).
+    Наследники отдают файл частями через render_chunks, что позволяет
+    передавать его в StreamingHttpResponse. Ошибки (словари) выдаются
+    как JSON.
+    """
+    charset = 'utf-8'
+
+    def render_chunks(self, ingredients):
+        raise NotImplementedError
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, dict):
+            return renderers.JSONRenderer().render(data)
+        return b''.join(
+            chunk if isinstance(chunk, bytes) else chunk.encode('utf-8')
+            for chunk in self.render_chunks(data or ())
+        )
+
+
+class TextShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def render_chunks(self, ingredients):
+        yield 'Игредиенты:\n\n'
+        separator = ''
+        for name, unit, amount in ingredients:
+            yield f'{separator} - {name} - {amount}({unit})'
+            separator = '\n'
+
+
+class Echo:
+    """
+    Псевдо-буфер для csv.writer: возвращает строку вместо записи.
+    """
+    def write(self, value):
+        return value
+
+
+class CSVShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render_chunks(self, ingredients):
+        writer = csv.writer(Echo())
+        yield writer.writerow(('name', 'measurement_unit', 'amount'))
+        for row in ingredients:
+            yield writer.writerow(row)
+
+
+class JSONShoppingListRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render_chunks(self, ingredients):
+        yield '['
+        separator = ''
+        for name, unit, amount in ingredients:
+            yield separator + json.dumps({
+                'name': name,
+                'measurement_unit': unit,
+                'amount': amount
+            }, ensure_ascii=False)
+            separator = ','
+        yield ']'
+
+
+class PDFShoppingListRenderer(ShoppingListRenderer):
+    """
+    В отличие от остальных форматов PDF строится в памяти целиком:
+    reportlab держит все страницы до canvas.save(). Строки списка
+    при этом читаются по мере обхода, а готовый файл отдается частями
+    по SHOPPING_LIST_CHUNK_SIZE байт.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+
+    def get_font(self):
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFError, TTFont
+
+        if self.font_name in pdfmetrics.getRegisteredFontNames():
+            return self.font_name
+        try:
+            pdfmetrics.registerFont(
+                TTFont(self.font_name, settings.SHOPPING_LIST_PDF_FONT)
+            )
+        except TTFError:
+            return 'Helvetica'
+        return self.font_name
+
+    def render_chunks(self, ingredients):
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        font = self.get_font()
+        _, height = A4
+        top, bottom, step = height - 60, 40, 18
+        pdf.setFont(font, 16)
+        pdf.drawString(40, top, 'Игредиенты:')
+        position = top - 2 * step
+        pdf.setFont(font, 12)
+        for name, unit, amount in ingredients:
+            if position < bottom:
+                pdf.showPage()
+                pdf.setFont(font, 12)
+                position = top
+            pdf.drawString(40, position, f' - {name} - {amount}({unit})')
+            position -= step
+        pdf.save()
+        buffer.seek(0)
+        chunk = buffer.read(settings.SHOPPING_LIST_CHUNK_SIZE)
+        while chunk:
+            yield chunk
+            chunk = buffer.read(settings.SHOPPING_LIST_CHUNK_SIZE)
+
+
+SHOPPING_LIST_RENDERERS = {
+    renderer.format: renderer for renderer in (
+        TextShoppingListRenderer,
+        CSVShoppingListRenderer,
+        JSONShoppingListRenderer,
+        PDFShoppingListRenderer
+    )
+}
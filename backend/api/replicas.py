@@ -0,0 +1,37 @@
+from django.conf import settings
+from foodgram.db_router import (choose_read_db, current_read_db,
+                                is_pinned_to_primary, pin_to_primary)
+from rest_framework.permissions import SAFE_METHODS
+
+
+class ReplicaReadMixin:
+    """
+    Безопасные запросы к представлению читают с реплики
+    (READ_REPLICAS), если пользователь не закреплен за основной БД.
+    Успешный изменяющий запрос закрепляет пользователя за основной БД
+    на READ_REPLICAS['STICKY_SECONDS'] секунд. Выбор делается после
+    аутентификации, поэтому учитывает пользователя токена.
+    """
+    read_db_token = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if (
+            settings.READ_REPLICAS['ALIASES']
+            and request.method in SAFE_METHODS
+            and not is_pinned_to_primary(request.user)
+        ):
+            self.read_db_token = current_read_db.set(choose_read_db())
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.read_db_token is not None:
+            current_read_db.reset(self.read_db_token)
+            self.read_db_token = None
+        if (
+            settings.READ_REPLICAS['ALIASES']
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and request.user.is_authenticated
+        ):
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
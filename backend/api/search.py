@@ -0,0 +1,73 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            TrigramSimilarity)
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import Case, F, FloatField, Q, Value, When
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+
+
+class PostgresRecipeSearch:
+    """
+    Полнотекстовый поиск по названию и описанию рецепта.
+    Совпадения берутся из GIN-индекса по search_vector, при включенном
+    pg_trgm добавляются нечеткие совпадения по названию (порог
+    сходства - pg_trgm.similarity_threshold). trigram=None включает
+    их, если расширение установлено: без него % и similarity()
+    завершали бы каждый поиск ошибкой.
+    """
+    def __init__(self, config, trigram=None):
+        self.config = config
+        self.trigram = trigram
+
+    @cached_property
+    def use_trigram(self):
+        if self.trigram is not None:
+            return self.trigram
+        with connections[DEFAULT_DB_ALIAS].cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            return cursor.fetchone() is not None
+
+    def search(self, queryset, text):
+        query = SearchQuery(text, config=self.config, search_type='websearch')
+        rank = SearchRank(F('search_vector'), query)
+        condition = Q(search_vector=query)
+        if self.use_trigram:
+            rank = rank + TrigramSimilarity('name', text)
+            condition |= Q(name__trigram_similar=text)
+        return queryset.filter(condition).annotate(
+            search_rank=rank
+        ).order_by('-search_rank', '-pub_date')
+
+
+class SimpleRecipeSearch:
+    """
+    Поиск через icontains для СУБД без полнотекстового поиска (SQLite).
+    Совпадения в названии ранжируются выше, чем в описании.
+    """
+    def __init__(self, **options):
+        pass
+
+    def search(self, queryset, text):
+        return queryset.filter(
+            Q(name__icontains=text) | Q(text__icontains=text)
+        ).annotate(
+            search_rank=Case(
+                When(name__icontains=text, then=Value(1.0)),
+                default=Value(0.5),
+                output_field=FloatField()
+            )
+        ).order_by('-search_rank', '-pub_date')
+
+
+@lru_cache(maxsize=None)
+def get_search_backend():
+    config = settings.RECIPE_SEARCH
+    return import_string(config['BACKEND'])(
+        config=config['CONFIG'],
+        trigram=config['TRIGRAM']
+    )
@@ -1,9 +1,14 @@
 from accounts.models import Follow
-from api.serializers_fields import AmountField, Base64ImageField
+from api.recipe_index import recipe_changed
+from api.serializers_fields import Base64ImageField, ImageVariantsField
+from api.shopping_cart import invalidate_recipe_shopping_carts
+from api.user_state import get_user_state
 from django.contrib.auth import get_user_model
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
                             RecipeIngredient, Tag)
+from recipes.tasks import schedule_image_variants
 from rest_framework import serializers
 
 User = get_user_model()
@@ -30,10 +35,9 @@ class UsersSerializer(serializers.ModelSerializer):
         """
         Проверка на подписку.
         """
-        user_me = self.context['request'].user
-        if not user_me.is_authenticated:
-            return False
-        return user_me.follower.filter(author=obj).exists()
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        return obj.pk in get_user_state(self.context['request']).following
 
 
 class TagSerializer(serializers.ModelSerializer):
@@ -70,15 +74,18 @@ class RecipeIngredientCreateSerializer(serializers.ModelSerializer):
 
 class RecipeIngredientViewSerializer(serializers.ModelSerializer):
     """
-    Сериализатор для выдачи рецепта(ов) при GET запросе.
+    Сериализатор для выдачи ингредиентов рецепта(ов) при GET запросе.
+    Строится по строкам RecipeIngredient, поэтому количество берется
+    из того рецепта, который выдается.
     """
-    amount = AmountField(
-        source='ingredient_recipe',
-        queryset=RecipeIngredient.objects.all()
+    id = serializers.ReadOnlyField(source='ingredient.id')
+    name = serializers.ReadOnlyField(source='ingredient.name')
+    measurement_unit = serializers.ReadOnlyField(
+        source='ingredient.measurement_unit'
     )
 
     class Meta:
-        model = Ingredient
+        model = RecipeIngredient
         fields = (
             'id',
             'name',
@@ -93,9 +100,13 @@ class RecipeViewSerializer(serializers.ModelSerializer):
     """
     tags = TagSerializer(many=True)
     author = UsersSerializer()
-    ingredients = RecipeIngredientViewSerializer(many=True)
+    ingredients = RecipeIngredientViewSerializer(
+        source='recipe_ingredient',
+        many=True
+    )
     is_favorited = serializers.SerializerMethodField()
     is_in_shopping_cart = serializers.SerializerMethodField()
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Recipe
@@ -108,6 +119,7 @@ class RecipeViewSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart',
             'name',
             'image',
+            'image_variants',
             'text',
             'cooking_time'
         )
@@ -116,19 +128,13 @@ class RecipeViewSerializer(serializers.ModelSerializer):
         """
         Проверка рецепта на вхождение в избранное.
         """
-        user_me = self.context['request'].user
-        if not user_me.is_authenticated:
-            return False
-        return user_me.favorite_user.filter(recipe=obj).exists()
+        return obj.pk in get_user_state(self.context['request']).favorites
 
     def get_is_in_shopping_cart(self, obj):
         """
         Проверка рецепта на вхождение в список покупок.
         """
-        user_me = self.context['request'].user
-        if not user_me.is_authenticated:
-            return False
-        return user_me.purchase_user.filter(recipe=obj).exists()
+        return obj.pk in get_user_state(self.context['request']).cart
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
@@ -151,52 +157,111 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             'author',
         )
 
-    def recipe_create_or_update(self, instance, validated_data):
+    def recipe_create_or_update(self, instance, validated_data,
+                                created=False):
         """
         Метод для создания или обновления ингредиентов и тегов.
+        Записываются только изменившиеся строки RecipeIngredient.
         """
         ingredients, tags = (
-            validated_data.pop('ingredients'), validated_data.pop('tags')
+            validated_data.pop('ingredients', None),
+            validated_data.pop('tags', None)
         )
-        for item in ingredients:
-            cur_obj, _ = RecipeIngredient.objects.get_or_create(
+        if tags is not None:
+            instance.tags.set(tags)
+        if ingredients is None:
+            return instance
+
+        amounts = {item['id']: item['amount'] for item in ingredients}
+        current = {} if created else {
+            item.ingredient_id: item
+            for item in instance.recipe_ingredient.all()
+        }
+        stale = [
+            item.pk for ingredient_id, item in current.items()
+            if ingredient_id not in amounts
+        ]
+        if stale:
+            RecipeIngredient.objects.filter(pk__in=stale).delete()
+        changed = []
+        for ingredient_id, item in current.items():
+            if ingredient_id in amounts and item.amount != amounts[
+                    ingredient_id]:
+                item.amount = amounts[ingredient_id]
+                changed.append(item)
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ('amount',))
+        added = [
+            RecipeIngredient(
                 recipe=instance,
-                ingredient=get_object_or_404(Ingredient, pk=item['id']),
-                amount=item['amount']
+                ingredient_id=ingredient_id,
+                amount=amount
             )
-        for item in tags:
-            instance.tags.add(item)
-
+            for ingredient_id, amount in amounts.items()
+            if ingredient_id not in current
+        ]
+        RecipeIngredient.objects.bulk_create(added)
+        if added:
+            recipe_changed(instance.pk)
+        if not created and (changed or added):
+            invalidate_recipe_shopping_carts((instance.pk,))
         return instance
 
+    @transaction.atomic
     def create(self, validated_data):
         raw_data = {
             'ingredients': validated_data.pop('ingredients'),
             'tags': validated_data.pop('tags')
         }
         recipe = Recipe.objects.create(**validated_data)
-        return self.recipe_create_or_update(recipe, raw_data)
+        schedule_image_variants(recipe)
+        return self.recipe_create_or_update(recipe, raw_data, created=True)
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        instance.ingredients.clear()
-        instance.tags.clear()
+        """
+        Сохраняются только переданные поля: счетчики и варианты
+        картинки меняются параллельно сигналами и фоновыми задачами,
+        полное сохранение затерло бы их значениями из памяти.
+        """
         instance = self.recipe_create_or_update(instance, validated_data)
-        return super().update(instance, validated_data)
+        for field, value in validated_data.items():
+            setattr(instance, field, value)
+        if validated_data:
+            instance.save(update_fields=list(validated_data))
+        if 'image' in validated_data:
+            schedule_image_variants(instance)
+        return instance
 
     def to_representation(self, instance):
+        prefetch_related_objects(
+            [instance],
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
         return RecipeViewSerializer(
             instance,
             context={'request': self.context.get('request')}
         ).data
 
     def validate_ingredients(self, ingredients):
-        unique_ingredients = []
-        for ingredient in ingredients:
-            if ingredient in unique_ingredients:
-                raise serializers.ValidationError(
-                    'Ингредиент не может повторяться!'
+        ingredient_ids = [ingredient['id'] for ingredient in ingredients]
+        if len(set(ingredient_ids)) != len(ingredient_ids):
+            raise serializers.ValidationError(
+                'Ингредиент не может повторяться!'
+            )
+        missing = set(ingredient_ids) - set(
+            Ingredient.objects.in_bulk(ingredient_ids)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                'Ингредиентов с id {} не существует!'.format(
+                    ', '.join(str(pk) for pk in sorted(missing))
                 )
-            unique_ingredients.append(ingredient)
+            )
         return ingredients
 
 
@@ -204,12 +269,15 @@ class RecipeSerializer(serializers.ModelSerializer):
     """
     Сериализатор для выдачи рецепта(ов) с общей информацией.
     """
+    image_variants = ImageVariantsField()
+
     class Meta:
         model = Recipe
         fields = (
             'id',
             'name',
             'image',
+            'image_variants',
             'cooking_time'
         )
 
@@ -234,30 +302,43 @@ class FollowSerializer(UsersSerializer):
             'recipes_count'
         )
 
+    @staticmethod
+    def get_recipes_limit(request):
+        recipes_limit = request.query_params.get('recipes_limit')
+        if not recipes_limit:
+            return None
+        if not recipes_limit.isdigit():
+            raise serializers.ValidationError(
+                {'recipes_limit': 'Введите целое число.'}
+            )
+        return int(recipes_limit)
+
     def get_recipes(self, author):
         """
         При наличии в параметрах запроса recipes_limit происходит
         выдача среза списка с ингредиентами.
+        Если рецепты авторов уже выбраны одним запросом
+        (context['recipes']), берутся оттуда.
         """
         request = self.context.get('request')
-        recipes_limit = request.query_params.get('recipes_limit')
-        if recipes_limit:
-            return RecipeSerializer(
-                Recipe.objects.filter(author=author)[:int(recipes_limit)],
-                context={'queryset': request},
-                many=True
-            ).data
+        if 'recipes' in self.context:
+            recipes = self.context['recipes'].get(author.pk, [])
+        else:
+            recipes = Recipe.objects.filter(author=author)
+            recipes_limit = self.get_recipes_limit(request)
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         return RecipeSerializer(
-            Recipe.objects.filter(author=author),
+            recipes,
             context={'queryset': request},
             many=True
         ).data
 
     def get_recipes_count(self, obj):
         """
-        Подсчет количества рецептов автора.
+        Количество рецептов автора (поддерживаемый счетчик).
         """
-        return obj.recipe_author.count()
+        return obj.recipes_count
 
 
 class FollowPostSerializer(serializers.ModelSerializer):
@@ -1,27 +1,91 @@
 import base64
+import binascii
+import tempfile
 
-from django.core.files.base import ContentFile
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from PIL import ImageFile
 from rest_framework import serializers
 
 
-class AmountField(serializers.RelatedField):
-    """
-    Настройка реляционного поля для amount.
-    """
-    def to_representation(self, value):
-        return value.first().amount
-
-    def to_internal_value(self, data):
-        return data
-
-
 class Base64ImageField(serializers.ImageField):
     """
     Создание кастомного поля для сериализации картинки.
+    Base64 декодируется частями во временный файл: размер ограничен
+    RECIPE_IMAGE['MAX_UPLOAD_SIZE'], а формат и размеры картинки
+    проверяются по заголовку до декодирования остальных данных.
     """
+    chunk_size = 64 * 1024
+    default_error_messages = {
+        'too_large': 'Размер картинки не должен превышать {max_size} байт.',
+        'invalid_base64': 'Некорректные данные base64.',
+        'invalid_format': 'Недопустимый формат картинки.',
+        'too_many_pixels': 'Слишком большое разрешение картинки.',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
-            data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+            data = File(self.decode(imgstr), name='temp.' + ext)
         return super().to_internal_value(data)
+
+    def decode(self, imgstr):
+        config = settings.RECIPE_IMAGE
+        max_size = config['MAX_UPLOAD_SIZE']
+        if len(imgstr) * 3 // 4 > max_size + 2:
+            self.fail('too_large', max_size=max_size)
+
+        parser = ImageFile.Parser()
+        header_checked = False
+        size = 0
+        step = self.chunk_size // 4 * 4
+        output = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        for start in range(0, len(imgstr), step):
+            chunk = self.decode_chunk(imgstr[start:start + step])
+            size += len(chunk)
+            if size > max_size:
+                self.fail('too_large', max_size=max_size)
+            if not header_checked:
+                try:
+                    parser.feed(chunk)
+                except (OSError, SyntaxError):
+                    self.fail('invalid_format')
+                if parser.image is not None:
+                    self.check_header(parser.image, config)
+                    header_checked = True
+            output.write(chunk)
+        if not header_checked:
+            self.fail('invalid_format')
+        output.seek(0)
+        return output
+
+    def decode_chunk(self, chunk):
+        try:
+            return base64.b64decode(chunk, validate=True)
+        except (binascii.Error, ValueError):
+            self.fail('invalid_base64')
+
+    def check_header(self, image, config):
+        if image.format not in config['ALLOWED_FORMATS']:
+            self.fail('invalid_format')
+        width, height = image.size
+        if width * height > config['MAX_PIXELS']:
+            self.fail('too_many_pixels')
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    Ссылки на уменьшенные копии картинки: {'card': url, 'detail': url}.
+    Пока копии не готовы, выдается пустой словарь.
+    """
+    def to_representation(self, value):
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in (value or {}).items():
+            url = default_storage.url(name)
+            urls[variant] = (
+                request.build_absolute_uri(url) if request else url
+            )
+        return urls
@@ -0,0 +1,79 @@
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum
+from foodgram.metrics import record_cache
+from recipes.models import Purchase, RecipeIngredient
+
+
+def get_cache_key(user_id):
+    return f'shopping_cart:{user_id}'
+
+
+def iterate_shopping_cart(user):
+    """
+    Список покупок пользователя в виде кортежей
+    (название, единица измерения, суммарное количество).
+    Строки читаются из БД по мере обхода.
+    """
+    return RecipeIngredient.objects.filter(
+        recipe__in=Purchase.objects.filter(
+            user=user
+        ).values('recipe')
+    ).values_list(
+        'ingredient__name',
+        'ingredient__measurement_unit'
+    ).annotate(
+        sum_ingredient=Sum('amount')
+    ).order_by(
+        'ingredient__name'
+    ).iterator()
+
+
+def aggregate_shopping_cart(user):
+    return list(iterate_shopping_cart(user))
+
+
+def get_shopping_cart(user):
+    """
+    Список покупок пользователя. В общем кеше (CACHE_SHARED) результат
+    агрегации хранится до изменения корзины или ингредиентов рецептов,
+    лежащих в ней; с кешем процесса строки читаются из БД по мере
+    обхода и целиком в памяти не собираются.
+    """
+    if not settings.CACHE_SHARED:
+        return iterate_shopping_cart(user)
+    key = get_cache_key(user.pk)
+    ingredients = cache.get(key)
+    record_cache('shopping_cart', ingredients is not None)
+    if ingredients is None:
+        ingredients = aggregate_shopping_cart(user)
+        cache.set(key, ingredients, settings.SHOPPING_CART_CACHE_TIMEOUT)
+    return ingredients
+
+
+def get_shopping_cart_digest(ingredients):
+    """
+    Хеш списка покупок, считается построчно.
+    """
+    digest = hashlib.sha1()
+    for row in ingredients:
+        digest.update(json.dumps(row, default=str).encode())
+    return digest.hexdigest()
+
+
+def invalidate_shopping_carts(user_ids):
+    cache.delete_many([get_cache_key(user_id) for user_id in user_ids])
+
+
+def invalidate_recipe_shopping_carts(recipe_ids):
+    """
+    Сбрасывает кеш у всех пользователей, в чьей корзине есть рецепты.
+    """
+    invalidate_shopping_carts(set(
+        Purchase.objects.filter(
+            recipe__in=recipe_ids
+        ).values_list('user', flat=True)
+    ))
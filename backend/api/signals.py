@@ -0,0 +1,68 @@
+from accounts.models import Follow
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.reference_data import reference_rows_changed
+from rest_framework.authtoken.models import Token
+
+from .authentication import invalidate_tokens
+from .cache import bump_version
+from .recipe_index import recipe_changed
+from .shopping_cart import (invalidate_recipe_shopping_carts,
+                            invalidate_shopping_carts)
+from .user_state import invalidate_user_states
+
+
+@receiver((post_save, post_delete), sender=Purchase)
+def purchase_changed(sender, instance, **kwargs):
+    invalidate_shopping_carts((instance.user_id,))
+
+
+@receiver((post_save, post_delete), sender=Follow)
+@receiver((post_save, post_delete), sender=Purchase)
+@receiver((post_save, post_delete), sender=Favorite)
+def user_state_changed(sender, instance, **kwargs):
+    invalidate_user_states((instance.user_id,))
+
+
+@receiver((post_save, post_delete), sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    invalidate_recipe_shopping_carts((instance.recipe_id,))
+    recipe_changed(instance.recipe_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    recipe_changed(instance.pk)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def recipe_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        recipe_changed(instance.pk)
+        return
+    for recipe_id in pk_set or ():
+        recipe_changed(recipe_id)
+
+
+@receiver((post_save, post_delete, reference_rows_changed), sender=Tag)
+@receiver((post_save, post_delete, reference_rows_changed), sender=Ingredient)
+def reference_data_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    invalidate_tokens((instance.key,))
+
+
+@receiver(post_save, sender=get_user_model())
+def user_changed(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_tokens(
+            Token.objects.filter(user=instance).values_list('key', flat=True)
+        )
@@ -0,0 +1,63 @@
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from jobs.queue import task
+
+from .renderers import SHOPPING_LIST_RENDERERS
+from .shopping_cart import (get_shopping_cart, get_shopping_cart_digest,
+                            iterate_shopping_cart)
+
+
+def get_export_storage():
+    """
+    Хранилище выгрузок вне MEDIA_ROOT: /media/ раздается nginx всем,
+    а выгрузки отдаются только владельцу через API.
+    """
+    return FileSystemStorage(location=settings.SHOPPING_LIST_EXPORT_ROOT)
+
+
+def get_export_name(user_id, file_format, digest):
+    return f'{user_id}/{digest[:16]}.{file_format}'
+
+
+@task(name='api.export_shopping_cart')
+def export_shopping_cart(user_id, file_format):
+    """
+    Сохраняет список покупок пользователя файлом в хранилище выгрузок
+    и возвращает путь к нему. Список собирается из БД: кеш процесса
+    воркера мог пропустить сбросы, сделанные в веб-процессах. Файл
+    пишется частями через временный файл.
+    """
+    storage = get_export_storage()
+    name = get_export_name(
+        user_id,
+        file_format,
+        get_shopping_cart_digest(iterate_shopping_cart(user_id))
+    )
+    if not storage.exists(name):
+        renderer = SHOPPING_LIST_RENDERERS[file_format]()
+        with tempfile.TemporaryFile() as output:
+            for chunk in renderer.render_chunks(
+                iterate_shopping_cart(user_id)
+            ):
+                output.write(
+                    chunk if isinstance(chunk, bytes) else chunk.encode()
+                )
+            output.seek(0)
+            name = storage.save(name, File(output, name))
+    return {'file': name}
+
+
+def schedule_shopping_cart_export(user, file_format):
+    """
+    Ставит выгрузку в очередь. Для неизменной корзины и того же
+    формата возвращается уже созданная задача.
+    """
+    digest = get_shopping_cart_digest(get_shopping_cart(user))
+    return export_shopping_cart.delay(
+        user.pk,
+        file_format,
+        idempotency_key=f'shopping-list:{user.pk}:{file_format}:{digest}'
+    )
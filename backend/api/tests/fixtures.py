@@ -0,0 +1,104 @@
+from accounts.models import Follow
+from api.cache import get_version_store, payload_cache
+from api.recipe_index import recipe_index
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
+                            RecipeIngredient, Tag)
+
+User = get_user_model()
+
+# Тесты, кроме тестов маршрутизации (test_replicas), читают из основной
+# БД и проходят одинаково с DB_REPLICAS и без них.
+read_from_primary = override_settings(
+    READ_REPLICAS={**settings.READ_REPLICAS, 'ALIASES': []}
+)
+
+
+def create_user(number):
+    return User.objects.create_user(
+        email=f'user{number}@foodgram.test',
+        username=f'user{number}',
+        first_name='Имя',
+        last_name='Фамилия',
+        password='Pass-12345'
+    )
+
+
+def create_tags(count=3):
+    return [
+        Tag.objects.create(
+            name=f'Тег {number}', color=f'#00000{number}', slug=f'tag{number}'
+        )
+        for number in range(count)
+    ]
+
+
+def create_ingredients(count=10):
+    return [
+        Ingredient.objects.create(
+            name=f'Ингредиент {number}', measurement_unit='г'
+        )
+        for number in range(count)
+    ]
+
+
+def create_recipes(authors, tags, ingredients, count):
+    """
+    Рецепты по очереди от каждого автора, с одним-тремя тегами
+    и тремя ингредиентами.
+    """
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            author=authors[number % len(authors)],
+            name=f'Рецепт {number}',
+            text='Описание',
+            cooking_time=10,
+            image='recipe/test.png'
+        )
+        recipe.tags.set(tags[:1 + number % len(tags)])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe,
+                ingredient=ingredients[(number + shift) % len(ingredients)],
+                amount=shift + 1
+            )
+            for shift in range(3)
+        )
+        recipes.append(recipe)
+    return recipes
+
+
+def mark_recipes(user, recipes):
+    """
+    Добавляет рецепты в избранное и список покупок пользователя.
+    """
+    for recipe in recipes:
+        Favorite.objects.create(user=user, recipe=recipe)
+        Purchase.objects.create(user=user, recipe=recipe)
+
+
+def follow(user, authors):
+    for author in authors:
+        Follow.objects.create(user=user, author=author)
+
+
+def reset_recipe_index():
+    """
+    Индекс - синглтон модуля: его версия осталась бы от другого теста,
+    а хранилище версий откатывается вместе с транзакцией теста.
+    """
+    recipe_index.version = None
+    recipe_index.clear()
+    get_version_store().clear()
+
+
+def reset_reference_cache():
+    """
+    Ответы и версии в памяти процесса остались бы от другого теста,
+    а хранилище версий откатывается вместе с транзакцией теста.
+    """
+    payload_cache.clear()
+    get_version_store().clear()
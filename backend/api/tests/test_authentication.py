@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from ..authentication import get_cache_key, local_tokens
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@read_from_primary
+class CachedTokenAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        local_tokens.clear()
+        self.user = create_user(0)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def me(self):
+        return self.client.get('/api/users/me/').status_code
+
+    @override_settings(CACHE_SHARED=True)
+    def test_set_password_keeps_maintained_counters(self):
+        self.assertEqual(self.me(), 200)
+        create_recipes(
+            [self.user], create_tags(), create_ingredients(), 3
+        )
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': 'Pass-12345',
+            'new_password': 'New-pass-54321',
+        })
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.recipes_count, 3)
+        self.assertTrue(self.user.check_password('New-pass-54321'))
+
+    @override_settings(CACHE_SHARED=True)
+    def test_logout_invalidates_shared_cache(self):
+        self.assertEqual(self.me(), 200)
+        self.token.delete()
+        self.assertEqual(self.me(), 401)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_local_cache_is_not_used(self):
+        self.assertEqual(self.me(), 200)
+        self.assertIsNone(cache.get(get_cache_key(self.token.key)))
+        self.assertIsNone(local_tokens.get(get_cache_key(self.token.key)))
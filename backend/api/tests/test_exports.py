@@ -0,0 +1,72 @@
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test import TestCase, override_settings
+from jobs.models import Job
+from rest_framework.test import APIClient
+
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+EXPORT_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(
+    SHOPPING_LIST_EXPORT_ROOT=EXPORT_ROOT,
+    JOBS={**settings.JOBS, 'EAGER': True}
+)
+@read_from_primary
+class ShoppingCartExportTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.recipes = create_recipes(
+            [create_user(1)], create_tags(), create_ingredients(), 2
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(EXPORT_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self):
+        response = self.client.post(
+            '/api/recipes/shopping_cart_export/', {'file_format': 'csv'}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def download(self, url, user):
+        client = APIClient()
+        if user is not None:
+            client.force_authenticate(user)
+        return client.get(url)
+
+    def test_export_is_served_only_to_owner(self):
+        self.client.post(f'/api/recipes/{self.recipes[0].pk}/shopping_cart/')
+        data = self.export()
+        self.assertNotIn(settings.MEDIA_URL, data['file'])
+        response = self.download(data['file'], self.user)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            'Ингредиент 0', b''.join(response.streaming_content).decode()
+        )
+        self.assertEqual(
+            self.download(data['file'], create_user(2)).status_code, 404
+        )
+        self.assertEqual(self.download(data['file'], None).status_code, 401)
+
+    def test_unchanged_cart_reuses_job(self):
+        self.client.post(f'/api/recipes/{self.recipes[0].pk}/shopping_cart/')
+        first = self.export()
+        self.assertEqual(self.export()['id'], first['id'])
+        self.client.post(f'/api/recipes/{self.recipes[1].pk}/shopping_cart/')
+        self.assertNotEqual(self.export()['id'], first['id'])
+        self.assertEqual(
+            Job.objects.filter(name='api.export_shopping_cart').count(), 2
+        )
@@ -0,0 +1,52 @@
+from django.test import TestCase
+from recipes.models import Recipe
+from rest_framework.test import APIClient
+
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@read_from_primary
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipes = create_recipes(
+            [create_user(0)], create_tags(), create_ingredients(), 5
+        )
+        Recipe.objects.filter(pk=cls.recipes[0].pk).update(name='Борщ')
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def get_ids(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_cursor_pages_follow_default_order(self):
+        ids = []
+        url = '/api/recipes/?cursor=&limit=2'
+        while url:
+            response = self.client.get(url)
+            ids += self.get_ids(response)
+            url = response.data['next']
+        self.assertEqual(
+            ids, [recipe.pk for recipe in reversed(self.recipes)]
+        )
+
+    def test_search_is_ranked(self):
+        response = self.client.get('/api/recipes/', {'search': 'Борщ'})
+        self.assertEqual(self.get_ids(response), [self.recipes[0].pk])
+        response = self.client.get('/api/recipes/', {'search': 'Рецепт'})
+        self.assertEqual(
+            self.get_ids(response),
+            [recipe.pk for recipe in reversed(self.recipes[1:])]
+        )
+
+    def test_cursor_with_search_is_rejected(self):
+        for cursor in ('', 'e30='):
+            with self.subTest(cursor=cursor):
+                response = self.client.get(
+                    '/api/recipes/', {'search': 'Борщ', 'cursor': cursor}
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('cursor', response.data)
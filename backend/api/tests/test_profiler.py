@@ -0,0 +1,60 @@
+import re
+import time
+
+from django.conf import settings
+from django.test import AsyncClient, Client, SimpleTestCase, override_settings
+from django.urls import path
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from ..async_views import async_read_patterns
+
+RENDER_SECONDS = 0.05
+
+
+class SlowRenderer(JSONRenderer):
+    def render(self, *args, **kwargs):
+        time.sleep(RENDER_SECONDS)
+        return super().render(*args, **kwargs)
+
+
+class SlowRenderView(APIView):
+    authentication_classes = ()
+    permission_classes = ()
+    renderer_classes = (SlowRenderer,)
+
+    def get(self, request):
+        return Response({'ok': True})
+
+
+urlpatterns = [
+    path('sync/', SlowRenderView.as_view(), name='sync'),
+    *async_read_patterns(
+        [path('async/', SlowRenderView.as_view(), name='async')], ('async',)
+    ),
+]
+
+
+@override_settings(
+    ROOT_URLCONF=__name__,
+    SQL_PROFILER={**settings.SQL_PROFILER, 'ENABLED': True}
+)
+class SQLProfilerTests(SimpleTestCase):
+    def get_render_ms(self, response):
+        self.assertEqual(response.status_code, 200)
+        return float(re.search(
+            r'render;dur=([\d.]+)', response['Server-Timing']
+        ).group(1))
+
+    def test_render_time_is_measured(self):
+        self.assertGreaterEqual(
+            self.get_render_ms(Client().get('/sync/')),
+            RENDER_SECONDS * 1000
+        )
+
+    async def test_render_time_is_measured_on_async_read_path(self):
+        self.assertGreaterEqual(
+            self.get_render_ms(await AsyncClient().get('/async/')),
+            RENDER_SECONDS * 1000
+        )
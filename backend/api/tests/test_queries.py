@@ -0,0 +1,81 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, follow, mark_recipes, read_from_primary)
+
+
+@read_from_primary
+class QueryCountTests(TestCase):
+    """
+    Число запросов к БД в выдаче не зависит от количества рецептов
+    и авторов на странице.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.authors = [create_user(number) for number in range(1, 4)]
+        cls.tags = create_tags()
+        cls.ingredients = create_ingredients()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, url):
+        cache.clear()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.get(url)
+        return len(queries)
+
+    def add_recipes(self, count):
+        recipes = create_recipes(
+            self.authors, self.tags, self.ingredients, count
+        )
+        mark_recipes(self.user, recipes[::2])
+        return recipes
+
+    def test_recipe_list(self):
+        self.add_recipes(2)
+        few = self.count_queries('/api/recipes/?limit=50')
+        self.add_recipes(10)
+        with self.assertNumQueries(few):
+            response = self.get('/api/recipes/?limit=50')
+        self.assertEqual(len(response.data['results']), 12)
+
+    def test_recipe_list_query_count(self):
+        self.add_recipes(6)
+        # COUNT, страница рецептов с авторами, теги, ингредиенты,
+        # состояние пользователя.
+        with self.assertNumQueries(5):
+            self.get('/api/recipes/')
+
+    def test_recipe_detail(self):
+        recipe = self.add_recipes(1)[0]
+        # Рецепт с автором, теги, ингредиенты, состояние пользователя.
+        with self.assertNumQueries(4):
+            response = self.get(f'/api/recipes/{recipe.pk}/')
+        self.assertTrue(response.data['is_favorited'])
+        self.assertEqual(len(response.data['ingredients']), 3)
+
+    def test_subscriptions(self):
+        follow(self.user, self.authors[:1])
+        self.add_recipes(3)
+        url = '/api/users/subscriptions/?recipes_limit=2'
+        few = self.count_queries(url)
+        follow(self.user, self.authors[1:])
+        self.add_recipes(9)
+        with self.assertNumQueries(few):
+            response = self.get(url)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertTrue(all(
+            len(author['recipes']) == 2 for author in response.data['results']
+        ))
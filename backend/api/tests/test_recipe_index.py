@@ -0,0 +1,142 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from recipes.models import Recipe, RecipeIngredient
+from rest_framework.test import APIClient
+
+from ..recipe_index import recipe_index
+from .fixtures import (create_ingredients, create_tags, create_user,
+                       read_from_primary, reset_recipe_index)
+
+
+@read_from_primary
+class RecipeIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user(0)
+        cls.ingredients = create_ingredients(6)
+        cls.tags = create_tags(2)
+        cls.recipes = [
+            cls.create_recipe(number, ingredients, tag)
+            for number, (ingredients, tag) in enumerate((
+                ((0, 1, 2), 0),
+                ((0, 1, 2, 3), 1),
+                ((0, 1, 4), 0),
+                ((0, 1, 5), 1),
+                ((4, 5), 0),
+            ))
+        ]
+
+    @classmethod
+    def create_recipe(cls, number, ingredients, tag):
+        recipe = Recipe.objects.create(
+            author=cls.author,
+            name=f'Рецепт {number}',
+            text='Описание',
+            cooking_time=10,
+            image='recipe/test.png'
+        )
+        recipe.tags.set([cls.tags[tag]])
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(
+                recipe=recipe, ingredient=cls.ingredients[index], amount=1
+            )
+            for index in ingredients
+        )
+        return recipe
+
+    def setUp(self):
+        cache.clear()
+        reset_recipe_index()
+
+    def ids(self, *indexes):
+        return [self.recipes[index].pk for index in indexes]
+
+    def ingredient_ids(self, *indexes):
+        return [self.ingredients[index].pk for index in indexes]
+
+    def similar(self, recipe=0, **kwargs):
+        return recipe_index.similar(self.recipes[recipe].pk, **kwargs)
+
+    def test_similar_ranks_by_jaccard_then_newest(self):
+        self.assertEqual(
+            self.similar(),
+            list(zip(self.ids(1, 3, 2), (0.75, 0.5, 0.5)))
+        )
+        for _ in range(5):
+            self.assertEqual(
+                [pk for pk, _ in self.similar(limit=2)], self.ids(1, 3)
+            )
+
+    def test_similar_filters_by_tags(self):
+        self.assertEqual(
+            [pk for pk, _ in self.similar(tag_ids={self.tags[0].pk})],
+            self.ids(2)
+        )
+        self.assertEqual(
+            [pk for pk, _ in self.similar(
+                tag_ids={self.tags[1].pk}, limit=1
+            )],
+            self.ids(1)
+        )
+
+    def test_pantry_coverage_and_missing(self):
+        have = self.ingredient_ids(0, 1, 2)
+        self.assertEqual(
+            recipe_index.pantry(have), [(self.recipes[0].pk, 1.0, [])]
+        )
+        matches = recipe_index.pantry(have, max_missing=1)
+        self.assertEqual(
+            [(pk, round(coverage, 2), missing)
+             for pk, coverage, missing in matches],
+            [
+                (self.recipes[0].pk, 1.0, []),
+                (self.recipes[1].pk, 0.75, self.ingredient_ids(3)),
+                (self.recipes[3].pk, 0.67, self.ingredient_ids(5)),
+                (self.recipes[2].pk, 0.67, self.ingredient_ids(4)),
+            ]
+        )
+        self.assertEqual(
+            [pk for pk, _, _ in recipe_index.pantry(
+                have, max_missing=1, tag_ids={self.tags[1].pk}
+            )],
+            self.ids(1, 3)
+        )
+
+    def test_changes_are_applied_incrementally(self):
+        self.similar()
+        with mock.patch.object(
+            recipe_index, 'build', side_effect=AssertionError
+        ):
+            with self.captureOnCommitCallbacks(execute=True):
+                RecipeIngredient.objects.create(
+                    recipe=self.recipes[2],
+                    ingredient=self.ingredients[2],
+                    amount=1
+                )
+                self.recipes[1].delete()
+            self.assertEqual(
+                self.similar(), list(zip(self.ids(2, 3), (0.75, 0.5)))
+            )
+            self.assertEqual(
+                [pk for pk, _, _ in recipe_index.pantry(
+                    self.ingredient_ids(0, 1, 2, 3)
+                )],
+                self.ids(0)
+            )
+
+    def test_pantry_endpoint(self):
+        response = APIClient().get('/api/recipes/pantry/', {
+            'ingredients': ','.join(map(str, self.ingredient_ids(0, 1, 2))),
+            'missing': 1,
+            'limit': 2,
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [(recipe['id'], recipe['missing_ingredients'])
+             for recipe in response.data],
+            [(self.recipes[0].pk, []),
+             (self.recipes[1].pk, self.ingredient_ids(3))]
+        )
+        self.assertEqual(response.data[0]['name'], 'Рецепт 0')
@@ -0,0 +1,98 @@
+from django.conf import settings
+from django.test import TestCase, override_settings
+from recipes.models import Favorite, Recipe
+from rest_framework.test import APIClient
+
+from ..serializers import RecipeCreateSerializer
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, mark_recipes, read_from_primary,
+                       reset_recipe_index)
+
+
+@read_from_primary
+class RecipeUpdateTests(TestCase):
+    def test_update_keeps_concurrently_maintained_fields(self):
+        author = create_user(0)
+        recipe = create_recipes(
+            [author], create_tags(), create_ingredients(), 1
+        )[0]
+        Favorite.objects.create(user=create_user(1), recipe=recipe)
+        Recipe.objects.filter(pk=recipe.pk).update(
+            image_variants={'card': 'recipe/variants/test_card.webp'}
+        )
+        serializer = RecipeCreateSerializer(
+            recipe, data={'name': 'Новое название'}, partial=True
+        )
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        recipe = Recipe.objects.get(pk=recipe.pk)
+        self.assertEqual(recipe.name, 'Новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+        self.assertEqual(
+            recipe.image_variants, {'card': 'recipe/variants/test_card.webp'}
+        )
+
+
+@read_from_primary
+class RecipeIndexParamsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.ingredients = create_ingredients()
+        cls.recipes = create_recipes(
+            [create_user(0)], create_tags(), cls.ingredients, 5
+        )
+        mark_recipes(create_user(1), cls.recipes)
+
+    def setUp(self):
+        reset_recipe_index()
+        self.client = APIClient()
+        pantry = ','.join(str(item.pk) for item in self.ingredients)
+        self.requests = (
+            (f'/api/recipes/{self.recipes[0].pk}/similar/', {}),
+            ('/api/recipes/pantry/', {'ingredients': pantry}),
+            ('/api/recipes/trending/', {}),
+        )
+
+    def test_limit_below_one_is_rejected(self):
+        for url, params in self.requests:
+            for limit in ('0', '-1', 'x'):
+                with self.subTest(url=url, limit=limit):
+                    response = self.client.get(
+                        url, {**params, 'limit': limit}
+                    )
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('limit', response.data)
+
+    @override_settings(RECIPE_INDEX={
+        **settings.RECIPE_INDEX, 'LIMIT': 1, 'MAX_LIMIT': 2
+    })
+    def test_large_limit_is_capped(self):
+        for url, params in self.requests:
+            with self.subTest(url=url):
+                self.assertEqual(len(self.client.get(url, params).data), 1)
+                response = self.client.get(url, {**params, 'limit': 100})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.data), 2)
+
+    def test_results_are_recipes(self):
+        fields = set(
+            self.client.get(f'/api/recipes/{self.recipes[0].pk}/').data
+        )
+        expected = (
+            [self.recipes[1].pk, self.recipes[2].pk],
+            [recipe.pk for recipe in self.recipes[:1:-1]],
+            None,
+        )
+        for (url, params), ids in zip(self.requests, expected):
+            with self.subTest(url=url):
+                response = self.client.get(url, {**params, 'limit': 3})
+                self.assertEqual(response.status_code, 200)
+                returned = [recipe['id'] for recipe in response.data]
+                if ids is None:
+                    self.assertEqual(len(set(returned)), 3)
+                else:
+                    self.assertEqual(returned, ids)
+                for recipe in response.data:
+                    self.assertLessEqual(fields, set(recipe))
+                    self.assertIs(recipe['is_in_shopping_cart'], False)
+                    self.assertEqual(len(recipe['ingredients']), 3)
@@ -0,0 +1,157 @@
+import os
+import tempfile
+import time
+from unittest import mock
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from recipes.models import Ingredient, Tag
+from recipes.reference_data import get_reference, load_reference
+from rest_framework.test import APIClient
+
+from ..cache import (DatabaseVersionStore, get_cache_name, get_version_store,
+                     payload_cache)
+from .fixtures import (create_ingredients, read_from_primary,
+                       reset_reference_cache)
+
+
+@read_from_primary
+class ReferenceCacheTests(TestCase):
+    url = '/api/ingredients/'
+
+    @classmethod
+    def setUpTestData(cls):
+        create_ingredients(3)
+
+    def setUp(self):
+        reset_reference_cache()
+        self.client = APIClient()
+
+    def test_not_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        for header in (etag, f'W/{etag}', f'"other", {etag}', '*'):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.url, HTTP_IF_NONE_MATCH=header
+                )
+                self.assertEqual(response.status_code, 304)
+
+    def test_other_etag_is_modified(self):
+        etag = self.client.get(self.url)['ETag']
+        for header in ('"other"', f'"{etag}"', f'{etag}x', ''):
+            with self.subTest(header=header):
+                response = self.client.get(
+                    self.url, HTTP_IF_NONE_MATCH=header
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_cached_read_does_not_query_database(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get(self.url).data), 3)
+
+    def test_version_of_other_process_is_read_after_timeout(self):
+        store, name = get_version_store(), get_cache_name(Ingredient)
+        version = store.get_version(name)
+        DatabaseVersionStore().bump(name)
+        self.assertEqual(store.get_version(name), version)
+        now = time.monotonic() + store.timeout + 1
+        with mock.patch('api.cache.time.monotonic', return_value=now):
+            self.assertEqual(store.get_version(name), version + 1)
+
+    def test_change_invalidates_payload_and_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        Ingredient.objects.create(name='Новый', measurement_unit='г')
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 4)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_depends_only_on_content(self):
+        first = self.client.get(self.url)['ETag']
+        payload_cache.clear()
+        get_version_store().bump(get_cache_name(Ingredient))
+        self.assertEqual(self.client.get(self.url)['ETag'], first)
+        self.assertNotEqual(
+            self.client.get(self.url, {'name': 'Ингредиент 1'})['ETag'],
+            first
+        )
+
+    @override_settings(REFERENCE_CACHE={
+        'BACKEND': 'api.cache.DatabaseVersionStore',
+        'MAX_ENTRIES': 1024,
+        'TIMEOUT': 0,
+        'VERSION_TIMEOUT': 0,
+    })
+    def test_payload_expires(self):
+        self.client.get(self.url)
+        Ingredient.objects.bulk_create(
+            [Ingredient(name='Без сигнала', measurement_unit='г')]
+        )
+        self.assertEqual(len(self.client.get(self.url).data), 4)
+
+    def test_database_version_store_is_shared(self):
+        first, second = DatabaseVersionStore(), DatabaseVersionStore()
+        self.assertEqual(first.get_version('test'), 0)
+        self.assertEqual(first.bump('test'), 1)
+        self.assertEqual(second.bump('test'), 2)
+        self.assertEqual(first.get_version('test'), 2)
+
+
+@read_from_primary
+class ReferenceDataLoadTests(TestCase):
+    def setUp(self):
+        reset_reference_cache()
+
+    def write(self, suffix, content):
+        with tempfile.NamedTemporaryFile(
+            'w', suffix=suffix, encoding='utf-8', delete=False
+        ) as file:
+            file.write(content)
+        self.addCleanup(os.remove, file.name)
+        return file.name
+
+    def test_load_invalidates_running_cache(self):
+        client = APIClient()
+        url = '/api/ingredients/?name=zzz'
+        etag = client.get(url)['ETag']
+        path = self.write('.csv', 'zzzfood,г\n')
+        load_reference(path, get_reference(path, 'ingredients'))
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in response.data], ['zzzfood']
+        )
+
+    def test_unique_conflict_is_reported_with_line(self):
+        Tag.objects.create(name='Завтрак', color='#ffa500', slug='breakfast')
+        for content, line in (
+            (
+                '[\n  {"name": "Обед", "color": "#ffa500", "slug": "lunch"}'
+                '\n]',
+                2
+            ),
+            (
+                '[\n  {"name": "Обед", "color": "#ffff00", "slug": "lunch"},'
+                '\n\n  {"name": "Ужин", "color": "#ffff00", "slug": "supper"}'
+                '\n]',
+                4
+            ),
+            (
+                '[{"name": "Обед", "color": "#ffff00", "slug": "lunch"},\n'
+                ' {"name": "Завтрак", "color": "#000000", "slug": "morning"}]',
+                2
+            ),
+        ):
+            with self.subTest(line=line):
+                path = self.write('.json', content)
+                with self.assertRaisesRegex(
+                    CommandError, f'{path}: строка {line}: '
+                ):
+                    call_command(
+                        'load_reference_data', path, reference='tags'
+                    )
+                self.assertEqual(
+                    list(Tag.objects.values_list('slug', flat=True)),
+                    ['breakfast']
+                )
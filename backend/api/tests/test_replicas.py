@@ -0,0 +1,80 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from foodgram import db_router
+from rest_framework.test import APIClient
+
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user)
+
+REPLICA = 'replica_1'
+
+
+@skipUnless(REPLICA in settings.DATABASES, 'нужен DB_REPLICAS')
+@override_settings(CACHE_SHARED=True)
+class ReplicaRoutingTests(TransactionTestCase):
+    """
+    Реплика в тестах повторяет основную БД (TEST MIRROR), но открывает
+    свое соединение, поэтому запросы считаются по алиасам.
+    Запускается с DB_REPLICAS=<путь к файлу>.
+    """
+    databases = {DEFAULT_DB_ALIAS, REPLICA} & set(settings.DATABASES)
+
+    def setUp(self):
+        cache.clear()
+        db_router.replica_status.clear()
+        self.user = create_user(0)
+        self.author = create_user(1)
+        self.recipe = create_recipes(
+            [self.author], create_tags(), create_ingredients(), 1
+        )[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def read_from(self, client=None):
+        """Алиасы, к которым обратилось чтение рецепта."""
+        with CaptureQueriesContext(
+            connections[DEFAULT_DB_ALIAS]
+        ) as primary, CaptureQueriesContext(connections[REPLICA]) as replica:
+            response = (client or self.client).get(
+                f'/api/recipes/{self.recipe.pk}/'
+            )
+        self.assertEqual(response.status_code, 200)
+        return {
+            alias for alias, queries in (
+                (DEFAULT_DB_ALIAS, primary), (REPLICA, replica)
+            )
+            if queries
+        }
+
+    def test_reads_go_to_replica(self):
+        self.assertEqual(self.read_from(), {REPLICA})
+        self.assertEqual(self.read_from(APIClient()), {REPLICA})
+
+    def test_write_pins_user_to_primary(self):
+        response = self.client.post(f'/api/recipes/{self.recipe.pk}/favorite/')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.read_from(), {DEFAULT_DB_ALIAS})
+        other = APIClient()
+        other.force_authenticate(self.author)
+        self.assertEqual(self.read_from(other), {REPLICA})
+        cache.delete(db_router.get_pin_key(self.user.pk))
+        self.assertEqual(self.read_from(), {REPLICA})
+
+    @override_settings(CACHE_SHARED=False)
+    def test_users_read_primary_without_shared_cache(self):
+        self.assertEqual(self.read_from(), {DEFAULT_DB_ALIAS})
+        self.assertEqual(self.read_from(APIClient()), {REPLICA})
+
+    def test_unusable_replica_falls_back_to_primary(self):
+        with mock.patch.object(
+            db_router, 'get_replica_lag', side_effect=DatabaseError
+        ):
+            self.assertEqual(self.read_from(), {DEFAULT_DB_ALIAS})
+        db_router.replica_status.clear()
+        with mock.patch.object(db_router, 'get_replica_lag', return_value=60):
+            self.assertEqual(self.read_from(), {DEFAULT_DB_ALIAS})
@@ -0,0 +1,53 @@
+from unittest import skipUnless
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from recipes.models import Recipe
+from rest_framework.test import APIClient
+
+from ..search import PostgresRecipeSearch, get_search_backend
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+@read_from_primary
+class PostgresSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.recipes = create_recipes(
+            [create_user(0)], create_tags(), create_ingredients(), 2
+        )
+        Recipe.objects.filter(pk=cls.recipes[0].pk).update(
+            name='Пироги с капустой'
+        )
+
+    def test_trigram_follows_installed_extension(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"
+            )
+            installed = cursor.fetchone() is not None
+        search = PostgresRecipeSearch(settings.RECIPE_SEARCH['CONFIG'])
+        self.assertEqual(search.use_trigram, installed)
+        self.assertIs(PostgresRecipeSearch('simple', False).use_trigram, False)
+
+    def test_trigger_uses_search_config(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT prosrc FROM pg_proc "
+                "WHERE proname = 'recipe_search_vector_update'"
+            )
+            source = cursor.fetchone()[0]
+        self.assertIn(f"'{settings.RECIPE_SEARCH['CONFIG']}'", source)
+
+    def test_search_matches_word_forms(self):
+        get_search_backend.cache_clear()
+        self.addCleanup(get_search_backend.cache_clear)
+        response = APIClient().get('/api/recipes/', {'search': 'пирог'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.recipes[0].pk]
+        )
@@ -0,0 +1,60 @@
+from collections.abc import Iterator
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..shopping_cart import get_cache_key, get_shopping_cart
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@read_from_primary
+class ShoppingCartCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.recipes = create_recipes(
+            [create_user(1)], create_tags(), create_ingredients(), 2
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def add_to_cart(self, recipe):
+        response = self.client.post(f'/api/recipes/{recipe.pk}/shopping_cart/')
+        self.assertEqual(response.status_code, 201)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_shared_cache_is_invalidated_on_purchase(self):
+        self.add_to_cart(self.recipes[0])
+        self.assertEqual(len(list(get_shopping_cart(self.user))), 3)
+        self.assertIsNotNone(cache.get(get_cache_key(self.user.pk)))
+        self.add_to_cart(self.recipes[1])
+        self.assertIsNone(cache.get(get_cache_key(self.user.pk)))
+        self.assertEqual(len(list(get_shopping_cart(self.user))), 4)
+
+    @override_settings(CACHE_SHARED=False)
+    def test_local_cache_is_not_used(self):
+        self.add_to_cart(self.recipes[0])
+        self.assertEqual(len(list(get_shopping_cart(self.user))), 3)
+        self.assertIsNone(cache.get(get_cache_key(self.user.pk)))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_download_streams_rows_from_database(self):
+        self.add_to_cart(self.recipes[0])
+        rows = get_shopping_cart(self.user)
+        self.assertIsInstance(rows, Iterator)
+        with self.assertNumQueries(0):
+            response = self.client.get(
+                '/api/recipes/download_shopping_cart/', {'format': 'csv'}
+            )
+        self.assertTrue(response.streaming)
+        with self.assertNumQueries(1):
+            content = b''.join(response.streaming_content).decode()
+        self.assertEqual(content.splitlines(), [
+            'name,measurement_unit,amount',
+            *(f'{name},{unit},{amount}' for name, unit, amount in rows)
+        ])
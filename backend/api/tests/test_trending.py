@@ -0,0 +1,84 @@
+import datetime
+from importlib import import_module
+
+from django.apps import apps
+from django.conf import settings
+from django.test import TestCase
+from recipes.models import RecipeScore
+from recipes.trending import decay_scores, get_slot, rebuild_scores
+from rest_framework.test import APIClient
+
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@read_from_primary
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.recipes = create_recipes(
+            [create_user(1)], create_tags(), create_ingredients(), 3
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def change(self, method, recipe, action):
+        response = getattr(self.client, method)(
+            f'/api/recipes/{recipe.pk}/{action}/'
+        )
+        self.assertLess(response.status_code, 300)
+
+    def get_scores(self):
+        return dict(RecipeScore.objects.values_list('recipe_id', 'score'))
+
+    def test_events_change_scores_and_order(self):
+        first, second, third = self.recipes
+        self.change('post', first, 'favorite')
+        self.change('post', second, 'shopping_cart')
+        scores = self.get_scores()
+        self.assertAlmostEqual(scores[first.pk], 1.0, delta=0.05)
+        self.assertAlmostEqual(scores[second.pk], 2.0, delta=0.05)
+        self.assertNotIn(third.pk, scores)
+        response = self.client.get('/api/recipes/trending/')
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data],
+            [second.pk, first.pk]
+        )
+        self.change('delete', second, 'shopping_cart')
+        self.assertAlmostEqual(self.get_scores()[second.pk], 0.0, places=6)
+
+    def test_decay_halves_score_per_half_life(self):
+        self.change('post', self.recipes[0], 'shopping_cart')
+        score = self.get_scores()[self.recipes[0].pk]
+        RecipeScore.objects.update(decayed_at=get_slot(
+            datetime.datetime.now(datetime.timezone.utc)
+        ) - datetime.timedelta(seconds=settings.TRENDING['HALF_LIFE']))
+        decay_scores()
+        self.assertAlmostEqual(
+            self.get_scores()[self.recipes[0].pk], score / 2, places=6
+        )
+        RecipeScore.objects.update(score=settings.TRENDING['MIN_SCORE'] / 2)
+        self.assertEqual(decay_scores()['deleted'], 1)
+
+    def test_rebuild_matches_incremental_scores(self):
+        self.change('post', self.recipes[0], 'favorite')
+        self.change('post', self.recipes[0], 'shopping_cart')
+        self.change('post', self.recipes[1], 'favorite')
+        incremental = self.get_scores()
+        rebuild_scores()
+        rebuilt = self.get_scores()
+        self.assertEqual(set(rebuilt), set(incremental))
+        for recipe_id, score in incremental.items():
+            self.assertAlmostEqual(rebuilt[recipe_id], score, places=2)
+        RecipeScore.objects.all().delete()
+        import_module(
+            'recipes.migrations.0009_trending_scores'
+        ).fill_scores(apps, None)
+        self.assertEqual(self.get_scores().keys(), rebuilt.keys())
+        for recipe_id, score in rebuilt.items():
+            self.assertAlmostEqual(
+                self.get_scores()[recipe_id], score, places=2
+            )
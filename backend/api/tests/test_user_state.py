@@ -0,0 +1,55 @@
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ..user_state import get_cache_key
+from .fixtures import (create_ingredients, create_recipes, create_tags,
+                       create_user, read_from_primary)
+
+
+@read_from_primary
+class UserStateTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user(0)
+        cls.author = create_user(1)
+        cls.recipe = create_recipes(
+            [cls.author], create_tags(), create_ingredients(), 1
+        )[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_flags(self):
+        data = self.client.get(f'/api/recipes/{self.recipe.pk}/').data
+        return (
+            data['is_favorited'],
+            data['is_in_shopping_cart'],
+            data['author']['is_subscribed']
+        )
+
+    def change_all(self, method):
+        for url in (
+            f'/api/recipes/{self.recipe.pk}/favorite/',
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/',
+            f'/api/users/{self.author.pk}/subscribe/',
+        ):
+            response = getattr(self.client, method)(url)
+            self.assertLess(response.status_code, 300)
+
+    @override_settings(CACHE_SHARED=True)
+    def test_shared_cache_is_invalidated(self):
+        self.assertEqual(self.get_flags(), (False, False, False))
+        self.assertIsNotNone(cache.get(get_cache_key(self.user.pk)))
+        self.change_all('post')
+        self.assertEqual(self.get_flags(), (True, True, True))
+        self.change_all('delete')
+        self.assertEqual(self.get_flags(), (False, False, False))
+
+    @override_settings(CACHE_SHARED=False)
+    def test_local_cache_is_not_used(self):
+        self.change_all('post')
+        self.assertEqual(self.get_flags(), (True, True, True))
+        self.assertIsNone(cache.get(get_cache_key(self.user.pk)))
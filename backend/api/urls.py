@@ -1,15 +1,35 @@
+from api.async_views import async_read_patterns
 from api.views import (IngredientViewSet, RecipeViewSet, TagViewSet,
                        UsersViewSet)
+from django.conf import settings
 from django.urls import include, path, re_path
 from djoser import views
 from rest_framework import routers
 
+ASYNC_READ_VIEWS = (
+    'recipes-list',
+    'recipes-detail',
+    'recipes-similar',
+    'recipes-pantry',
+    'recipes-trending',
+    'tag-list',
+    'tag-detail',
+    'ingredient-list',
+    'ingredient-detail'
+)
+
 router = routers.DefaultRouter()
 router.register(r'users', UsersViewSet, basename='users')
 router.register(r'tags', TagViewSet)
 router.register(r'ingredients', IngredientViewSet)
 router.register(r'recipes', RecipeViewSet, basename='recipes')
 
+router_urlpatterns = router.urls
+if settings.ASYNC_READ['ENABLED']:
+    router_urlpatterns = async_read_patterns(
+        router_urlpatterns, ASYNC_READ_VIEWS
+    )
+
 auth_urlpatterns = [
     re_path(
         r"^token/login/?$",
@@ -25,5 +45,5 @@ auth_urlpatterns = [
 
 urlpatterns = [
     path('auth/', include(auth_urlpatterns)),
-    path('', include(router.urls))
+    path('', include(router_urlpatterns))
 ]
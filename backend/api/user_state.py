@@ -0,0 +1,79 @@
+from array import array
+
+from accounts.models import Follow
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import IntegerField, Value
+from foodgram.metrics import record_cache
+from recipes.models import Favorite, Purchase
+
+FAVORITES, CART, FOLLOWING = range(3)
+
+
+def get_cache_key(user_id):
+    return f'user_state:{user_id}'
+
+
+class UserState:
+    """
+    Множества id избранных рецептов, рецептов в корзине и авторов,
+    на которых подписан пользователь. Флаги в выдаче проверяются
+    по ним без запросов к БД.
+    """
+    def __init__(self, favorites=(), cart=(), following=()):
+        self.favorites = frozenset(favorites)
+        self.cart = frozenset(cart)
+        self.following = frozenset(following)
+
+
+def load_user_state(user_id):
+    """
+    Читает все три множества одним запросом UNION ALL. В кеше они
+    хранятся отсортированными массивами целых чисел.
+    """
+    def member_ids(model, field, kind):
+        return model.objects.filter(user=user_id).order_by().annotate(
+            kind=Value(kind, output_field=IntegerField())
+        ).values_list('kind', field)
+
+    state = [array('q'), array('q'), array('q')]
+    for kind, object_id in member_ids(Favorite, 'recipe', FAVORITES).union(
+        member_ids(Purchase, 'recipe', CART),
+        member_ids(Follow, 'author', FOLLOWING),
+        all=True
+    ):
+        state[kind].append(object_id)
+    return [array('q', sorted(ids)) for ids in state]
+
+
+def get_cached_user_state(user_id):
+    """
+    Состояние из общего кеша (CACHE_SHARED), при промахе из БД.
+    С кешем процесса читается из БД: сброс по сигналу в одном
+    воркере не дошел бы до остальных.
+    """
+    if not settings.CACHE_SHARED:
+        return load_user_state(user_id)
+    key = get_cache_key(user_id)
+    state = cache.get(key)
+    record_cache('user_state', state is not None)
+    if state is None:
+        state = load_user_state(user_id)
+        cache.set(key, state, settings.USER_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def get_user_state(request):
+    """
+    Состояние пользователя запроса, читается один раз на запрос.
+    """
+    user = request.user
+    if not user.is_authenticated:
+        return UserState()
+    if not hasattr(request, 'user_state'):
+        request.user_state = UserState(*get_cached_user_state(user.pk))
+    return request.user_state
+
+
+def invalidate_user_states(user_ids):
+    cache.delete_many([get_cache_key(user_id) for user_id in user_ids])
@@ -1,29 +1,46 @@
 from accounts.models import Follow
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db.models import F, Sum
-from django.http import HttpResponse
+from django.db.models import (BooleanField, Exists, F, OuterRef, Prefetch,
+                              Value, Window)
+from django.db.models.functions import RowNumber
+from django.http import FileResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.serializers import SetPasswordSerializer, UserCreateSerializer
+from jobs.models import Job
 from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
-                            RecipeIngredient, Tag)
+                            RecipeIngredient, RecipeScore, Tag)
 from rest_framework import mixins, permissions, status
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.viewsets import GenericViewSet, ModelViewSet
 
+from .cache import ReferenceCacheMixin
 from .filters import IngredientFilter, RecipeFilter
+from .ingredient_index import ingredient_index
+from .pagination import KeysetPagination
 from .permissions import CustomerAccessPermission
+from .recipe_index import recipe_index
+from .renderers import (SHOPPING_LIST_RENDERERS, CSVShoppingListRenderer,
+                        JSONShoppingListRenderer, PDFShoppingListRenderer,
+                        TextShoppingListRenderer)
+from .replicas import ReplicaReadMixin
 from .serializers import (FavoriteSerializer, FollowPostSerializer,
                           FollowSerializer, IngredientSerializer,
                           PurchaseSerializer, RecipeCreateSerializer,
                           RecipeViewSerializer, TagSerializer, UsersSerializer)
+from .shopping_cart import get_shopping_cart
+from .tasks import (export_shopping_cart, get_export_storage,
+                    schedule_shopping_cart_export)
 
 User = get_user_model()
 
 
-class UsersViewSet(mixins.ListModelMixin,
+class UsersViewSet(ReplicaReadMixin,
+                   mixins.ListModelMixin,
                    mixins.CreateModelMixin,
                    mixins.RetrieveModelMixin,
                    GenericViewSet):
@@ -31,13 +48,16 @@ class UsersViewSet(mixins.ListModelMixin,
     Контроллер для обработки ресурса /users/.
     """
     filter_backends = [DjangoFilterBackend]
+    pagination_class = KeysetPagination
+    cursor_ordering = ('id',)
 
     def get_queryset(self):
         if self.action == 'subscriptions':
-            subscriptions = self.request.user.follower.values('author')
             return User.objects.filter(
-                pk__in=[pk['author'] for pk in subscriptions]
-            )
+                pk__in=self.request.user.follower.values('author')
+            ).annotate(
+                is_subscribed=Value(True, output_field=BooleanField())
+            ).order_by('id')
         return User.objects.order_by('id').all()
 
     def get_serializer_class(self):
@@ -72,18 +92,55 @@ class UsersViewSet(mixins.ListModelMixin,
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
+        # request.user может быть копией из кеша токенов: сохраняется
+        # только пароль, чтобы не записать устаревшие значения полей.
         self.request.user.set_password(serializer.data["new_password"])
-        self.request.user.save()
+        self.request.user.save(update_fields=['password'])
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(methods=['GET'], detail=False)
     def subscriptions(self, request, *args, **kwargs):
-        serializer = self.get_serializer(
-            self.paginate_queryset(self.get_queryset()),
-            many=True
+        authors = self.paginate_queryset(self.get_queryset())
+        context = self.get_serializer_context()
+        context['recipes'] = self.get_authors_recipes(
+            [author.pk for author in authors],
+            FollowSerializer.get_recipes_limit(request)
         )
+        serializer = FollowSerializer(authors, many=True, context=context)
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def get_authors_recipes(author_ids, recipes_limit=None):
+        """
+        Рецепты авторов страницы одним запросом: при recipes_limit
+        берутся первые N рецептов каждого автора через
+        ROW_NUMBER() OVER (PARTITION BY author_id ORDER BY pub_date DESC).
+        """
+        recipes = Recipe.objects.filter(
+            author__in=author_ids
+        ).only(
+            'id', 'author_id', 'name', 'image', 'image_variants',
+            'cooking_time', 'pub_date'
+        )
+        if recipes_limit is not None:
+            ranked = recipes.annotate(
+                row_number=Window(
+                    expression=RowNumber(),
+                    partition_by=[F('author_id')],
+                    order_by=[F('pub_date').desc(), F('id').desc()]
+                )
+            )
+            sql, params = ranked.query.sql_with_params()
+            recipes = Recipe.objects.raw(
+                f'SELECT * FROM ({sql}) ranked WHERE row_number <= %s '
+                f'ORDER BY author_id, row_number',
+                (*params, recipes_limit)
+            )
+        recipes_by_author = {}
+        for recipe in recipes:
+            recipes_by_author.setdefault(recipe.author_id, []).append(recipe)
+        return recipes_by_author
+
     @action(methods=['POST'], detail=True)
     def subscribe(self, request, *args, **kwargs):
         data = {
@@ -115,7 +172,9 @@ class UsersViewSet(mixins.ListModelMixin,
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class TagViewSet(mixins.ListModelMixin,
+class TagViewSet(ReplicaReadMixin,
+                 ReferenceCacheMixin,
+                 mixins.ListModelMixin,
                  mixins.RetrieveModelMixin,
                  GenericViewSet):
     """
@@ -126,7 +185,9 @@ class TagViewSet(mixins.ListModelMixin,
     pagination_class = None
 
 
-class IngredientViewSet(mixins.ListModelMixin,
+class IngredientViewSet(ReplicaReadMixin,
+                        ReferenceCacheMixin,
+                        mixins.ListModelMixin,
                         mixins.RetrieveModelMixin,
                         GenericViewSet):
     """
@@ -139,15 +200,51 @@ class IngredientViewSet(mixins.ListModelMixin,
     search_fields = ('^name',)
     pagination_class = None
 
+    def list(self, request, *args, **kwargs):
+        """
+        Запрос с одним фильтром name (автодополнение) обслуживается
+        индексом префиксов в памяти, параметр limit ограничивает выдачу.
+        """
+        params = request.query_params
+        if set(params) - {'limit'} != {'name'}:
+            return super().list(request, *args, **kwargs)
+        limit = params.get('limit')
+        if limit is not None and not limit.isdigit():
+            raise ValidationError({'limit': 'Введите целое число.'})
+        return self.cached_response(
+            request,
+            lambda: ingredient_index.search(
+                params['name'],
+                int(limit) if limit else None
+            )
+        )
 
-class RecipeViewSet(ModelViewSet):
+
+class RecipeViewSet(ReplicaReadMixin, ModelViewSet):
     """
     Контроллер для обработки ресурса /recipes/.
     """
-    queryset = Recipe.objects.all()
     http_method_names = ['get', 'post', 'patch', 'delete', 'head']
     filter_backends = [DjangoFilterBackend]
     filterset_class = RecipeFilter
+    pagination_class = KeysetPagination
+    cursor_ordering = ('-pub_date', '-id')
+
+    def get_queryset(self):
+        """
+        Рецепты с подгруженными связями, чтобы выдача списка не зависела
+        по числу запросов от его размера. Флаги текущего пользователя
+        берутся из кешированного состояния (api.user_state).
+        """
+        return Recipe.objects.select_related(
+            'author'
+        ).prefetch_related(
+            'tags',
+            Prefetch(
+                'recipe_ingredient',
+                queryset=RecipeIngredient.objects.select_related('ingredient')
+            )
+        )
 
     def get_serializer_class(self):
         if self.action in ('create', 'partial_update'):
@@ -162,6 +259,8 @@ class RecipeViewSet(ModelViewSet):
         if self.action in (
                 'create',
                 'download_shopping_cart',
+                'shopping_cart_export',
+                'shopping_cart_export_file',
                 'shopping_cart',
                 'favorite'
         ):
@@ -176,30 +275,190 @@ class RecipeViewSet(ModelViewSet):
     def get_recipe(self):
         return get_object_or_404(Recipe, pk=self.kwargs['pk'])
 
-    @action(methods=['GET'], detail=False)
+    @action(
+        methods=['GET'],
+        detail=False,
+        renderer_classes=[
+            TextShoppingListRenderer,
+            CSVShoppingListRenderer,
+            JSONShoppingListRenderer,
+            PDFShoppingListRenderer
+        ]
+    )
     def download_shopping_cart(self, request):
-        ingredients = RecipeIngredient.objects.filter(
-            recipe__purchase_recipe__user=request.user
-        ).values(
-            name=F('ingredient__name'),
-            measurement_unit=F('ingredient__measurement_unit')
-        ).annotate(sum_ingredient=Sum('amount'))
-
-        shopping_list = 'Игредиенты:\n\n'
-        shopping_list += '\n'.join([
-            f' - {ingredient["name"]}'
-            f' - {ingredient["sum_ingredient"]}'
-            f'({ingredient["measurement_unit"]})'
-            for ingredient in ingredients
-        ])
-        response = HttpResponse(
-            shopping_list,
-            content_type='text/plain'
+        """
+        Выдача списка покупок файлом в формате из параметра format
+        (txt, csv, json, pdf), по умолчанию txt.
+        """
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.render_chunks(get_shopping_cart(request.user)),
+            content_type=(
+                f'{renderer.media_type}; charset={renderer.charset}'
+                if renderer.charset else renderer.media_type
+            )
+        )
+        filename = (
+            f'{self.request.user.username}_shopping_list.{renderer.format}'
         )
-        filename = f'{self.request.user.username}_shopping_list.txt'
         response['Content-Disposition'] = f'attachment; filename={filename}'
         return response
 
+    @action(methods=['POST'], detail=False)
+    def shopping_cart_export(self, request):
+        """
+        Фоновая выгрузка списка покупок в формате file_format.
+        Пока файл готовится, возвращается 202; повторный запрос
+        при неизменной корзине отдает ту же задачу, а после ее
+        завершения - ссылку на файл.
+        """
+        file_format = request.data.get('file_format', 'txt')
+        if file_format not in SHOPPING_LIST_RENDERERS:
+            raise ValidationError({'file_format': 'Неизвестный формат.'})
+        job = schedule_shopping_cart_export(request.user, file_format)
+        data = {'id': job.pk, 'status': job.status, 'file': None}
+        if job.status != Job.DONE:
+            return Response(data, status=status.HTTP_202_ACCEPTED)
+        data['file'] = request.build_absolute_uri(reverse(
+            'recipes-shopping-cart-export-file', args=(job.pk,)
+        ))
+        return Response(data)
+
+    @action(
+        methods=['GET'],
+        detail=False,
+        url_path=r'shopping_cart_export/(?P<job_id>\d+)',
+        url_name='shopping-cart-export-file'
+    )
+    def shopping_cart_export_file(self, request, job_id):
+        """
+        Готовый файл выгрузки. Отдается только пользователю,
+        для которого он собран.
+        """
+        job = get_object_or_404(
+            Job, pk=job_id, name=export_shopping_cart.name, status=Job.DONE
+        )
+        user_id, file_format = job.args
+        if user_id != request.user.pk:
+            raise NotFound
+        return FileResponse(
+            get_export_storage().open(job.result['file']),
+            as_attachment=True,
+            filename=f'{request.user.username}_shopping_list.{file_format}'
+        )
+
+    @staticmethod
+    def get_integer_param(request, name, default, minimum=0):
+        value = request.query_params.get(name)
+        if not value:
+            return default
+        if not value.isdigit() or int(value) < minimum:
+            raise ValidationError(
+                {name: f'Введите целое число не меньше {minimum}.'}
+            )
+        return int(value)
+
+    def get_index_params(self, request):
+        """
+        Общие параметры выдачи по индексу рецептов: limit и tags.
+        Если теги заданы, но ни одного нет, tag_ids пустое.
+        """
+        limit = min(
+            self.get_integer_param(
+                request, 'limit', settings.RECIPE_INDEX['LIMIT'], minimum=1
+            ),
+            settings.RECIPE_INDEX['MAX_LIMIT']
+        )
+        slugs = request.query_params.getlist('tags')
+        tag_ids = frozenset(
+            Tag.objects.filter(slug__in=slugs).values_list('id', flat=True)
+        ) if slugs else None
+        return limit, tag_ids
+
+    def get_ranked_data(self, recipe_ids):
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        return RecipeViewSerializer(
+            [recipes[pk] for pk in recipe_ids if pk in recipes],
+            many=True,
+            context=self.get_serializer_context()
+        ).data
+
+    @action(methods=['GET'], detail=True)
+    def similar(self, request, pk):
+        """
+        Рецепты с наибольшим пересечением ингредиентов (коэффициент
+        Жаккара) по индексу в памяти. Параметры: tags - слаги тегов,
+        хотя бы один из которых должен быть у рецепта, limit - размер
+        выдачи.
+        """
+        recipe = self.get_recipe()
+        limit, tag_ids = self.get_index_params(request)
+        if tag_ids is not None and not tag_ids:
+            return Response([])
+        scores = recipe_index.similar(recipe.pk, tag_ids, limit)
+        return Response(self.get_ranked_data([pk for pk, _ in scores]))
+
+    @action(methods=['GET'], detail=False)
+    def pantry(self, request):
+        """
+        Рецепты из имеющихся ингредиентов (ingredients - id через запятую
+        или повторяющимся параметром), с не более чем missing
+        недостающими, по убыванию доли имеющихся ингредиентов.
+        Принимает также tags и limit. К рецепту добавляется список
+        id недостающих ингредиентов missing_ingredients.
+        """
+        ingredient_ids = [
+            value
+            for values in request.query_params.getlist('ingredients')
+            for value in values.split(',')
+            if value
+        ]
+        if not ingredient_ids or not all(
+            value.isdigit() for value in ingredient_ids
+        ):
+            raise ValidationError(
+                {'ingredients': 'Укажите id ингредиентов через запятую.'}
+            )
+        max_missing = min(
+            self.get_integer_param(request, 'missing', 0),
+            settings.RECIPE_INDEX['MAX_MISSING']
+        )
+        limit, tag_ids = self.get_index_params(request)
+        if tag_ids is not None and not tag_ids:
+            return Response([])
+        matches = recipe_index.pantry(
+            map(int, ingredient_ids), max_missing, tag_ids, limit
+        )
+        missing = {pk: ingredients for pk, _, ingredients in matches}
+        return Response([
+            {**recipe, 'missing_ingredients': missing[recipe['id']]}
+            for recipe in self.get_ranked_data(
+                [pk for pk, _, _ in matches]
+            )
+        ])
+
+    @action(methods=['GET'], detail=False)
+    def trending(self, request):
+        """
+        Популярные рецепты по убыванию рейтинга RecipeScore (добавления
+        в избранное и список покупок с затуханием во времени), top-N
+        читается по индексу рейтинга. Принимает tags и limit.
+        """
+        limit, tag_ids = self.get_index_params(request)
+        if tag_ids is not None and not tag_ids:
+            return Response([])
+        scores = RecipeScore.objects.order_by('-score')
+        if tag_ids is not None:
+            scores = scores.filter(Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe_id=OuterRef('recipe_id'),
+                    tag_id__in=tag_ids
+                )
+            ))
+        return Response(self.get_ranked_data(
+            list(scores.values_list('recipe_id', flat=True)[:limit])
+        ))
+
     @action(methods=['POST'], detail=True)
     def shopping_cart(self, request, *args, **kwargs):
         return self.favorite(request, *args, **kwargs)
@@ -0,0 +1,230 @@
+"""
+Бенчмарк API: запросы к БД, время и выделения памяти по эндпоинтам.
+
+Создает тестовую базу, наполняет ее синтетическими данными заданного
+масштаба и прогоняет каждый эндпоинт api/urls.py через тестовый клиент.
+Результаты можно сохранить как baseline и сравнивать с ним следующие
+прогоны: рост числа запросов или времени/памяти больше порога
+завершает запуск с ошибкой.
+
+    cd backend
+    python -m benchmarks.api --scale recipes=2000 --save baseline.json
+    python -m benchmarks.api --scale recipes=2000 --compare baseline.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Разница меньше этой считается шумом, даже если превышает порог.
+MIN_TIME_DELTA_MS = 2.0
+MIN_MEMORY_DELTA = 16 * 1024
+
+
+def setup_django():
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram.settings')
+    import django
+
+    django.setup()
+    from django.conf import settings
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    settings.MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-bench-')
+    settings.JOBS = {**settings.JOBS, 'EAGER': False}
+
+
+def get_client(endpoint, context):
+    from rest_framework.test import APIClient
+
+    client = APIClient()
+    if not endpoint.anonymous:
+        client.credentials(HTTP_AUTHORIZATION=f'Token {context["token"]}')
+    return client
+
+
+def run_once(endpoint, context, measure):
+    client = get_client(endpoint, context)
+    if endpoint.setup:
+        endpoint.setup(client, context)
+    response, sample = measure(lambda: endpoint.request(client, context))
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{endpoint.name}: {response.status_code} '
+            f'{getattr(response, "data", response.content)}'
+        )
+    if endpoint.non_empty and not response.data:
+        raise RuntimeError(f'{endpoint.name}: пустой ответ')
+    if endpoint.teardown:
+        endpoint.teardown(client, context, response)
+    return sample
+
+
+def measure_time(request):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as captured:
+        started = time.perf_counter()
+        response = request()
+        elapsed = time.perf_counter() - started
+    return response, (elapsed * 1000, len(captured.captured_queries))
+
+
+def measure_memory(request):
+    tracemalloc.start()
+    try:
+        response = request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return response, peak
+
+
+def benchmark(endpoint, context, iterations):
+    """
+    Первый прогон прогревает кеши и не учитывается. Число запросов -
+    максимум по прогонам, память - пик выделений за отдельный прогон
+    под tracemalloc.
+    """
+    run_once(endpoint, context, measure_time)
+    samples = [
+        run_once(endpoint, context, measure_time)
+        for _ in range(iterations)
+    ]
+    times = sorted(elapsed for elapsed, _ in samples)
+    return {
+        'queries': max(queries for _, queries in samples),
+        'mean_ms': round(statistics.mean(times), 3),
+        'p50_ms': round(statistics.median(times), 3),
+        'p95_ms': round(times[min(len(times) - 1, int(len(times) * 0.95))], 3),
+        'peak_memory': run_once(endpoint, context, measure_memory),
+    }
+
+
+def compare(results, baseline, threshold):
+    """
+    Список регрессий относительно baseline.
+    """
+    failures = []
+    for name, result in results.items():
+        base = baseline['endpoints'].get(name)
+        if base is None:
+            continue
+        if result['queries'] > base['queries']:
+            failures.append(
+                f'{name}: запросов к БД {base["queries"]} -> '
+                f'{result["queries"]}'
+            )
+        checks = (
+            ('p50_ms', MIN_TIME_DELTA_MS),
+            ('p95_ms', MIN_TIME_DELTA_MS),
+            ('peak_memory', MIN_MEMORY_DELTA),
+        )
+        for key, min_delta in checks:
+            delta = result[key] - base[key]
+            if delta > min_delta and delta > base[key] * threshold:
+                failures.append(f'{name}: {key} {base[key]} -> {result[key]}')
+    return failures
+
+
+def parse_scale(values):
+    from .seed import DEFAULT_SCALE
+
+    scale = {}
+    for value in values or ():
+        key, _, number = value.partition('=')
+        if key not in DEFAULT_SCALE or not number.isdigit():
+            raise argparse.ArgumentTypeError(
+                f'Ожидается один из {", ".join(DEFAULT_SCALE)}=число'
+            )
+        scale[key] = int(number)
+    return scale
+
+
+def print_results(results):
+    print(f'{"endpoint":<38}{"queries":>8}{"p50, ms":>10}{"p95, ms":>10}'
+          f'{"peak, KiB":>11}')
+    for name, result in results.items():
+        print(f'{name:<38}{result["queries"]:>8}{result["p50_ms"]:>10.2f}'
+              f'{result["p95_ms"]:>10.2f}'
+              f'{result["peak_memory"] / 1024:>11.1f}')
+
+
+def run(options):
+    from django.db import connection
+
+    from .endpoints import ENDPOINTS, make_image
+    from .seed import seed
+
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    try:
+        context = seed(parse_scale(options.scale))
+        context['image'] = make_image()
+        results = {
+            endpoint.name: benchmark(endpoint, context, options.iterations)
+            for endpoint in ENDPOINTS
+            if not options.only or endpoint.name.startswith(
+                tuple(options.only)
+            )
+        }
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return {
+        'database': connection.vendor,
+        'scale': context['scale'],
+        'iterations': options.iterations,
+        'endpoints': results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--scale', action='append',
+        help='Масштаб данных, например recipes=2000 (можно повторять).'
+    )
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument(
+        '--only', action='append',
+        help='Префикс имени эндпоинта, например recipes.list.'
+    )
+    parser.add_argument('--save', help='Сохранить результаты как baseline.')
+    parser.add_argument('--compare', help='Сравнить с baseline.')
+    parser.add_argument(
+        '--threshold', type=float, default=0.2,
+        help='Допустимый относительный рост времени и памяти.'
+    )
+    options = parser.parse_args(argv)
+
+    setup_django()
+    report = run(options)
+    print_results(report['endpoints'])
+    if options.save:
+        with open(options.save, 'w') as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+    if not options.compare:
+        return 0
+    with open(options.compare) as source:
+        baseline = json.load(source)
+    if baseline['scale'] != report['scale']:
+        print('Масштаб данных не совпадает с baseline.')
+        return 2
+    failures = compare(report['endpoints'], baseline, options.threshold)
+    for failure in failures:
+        print(f'РЕГРЕССИЯ {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
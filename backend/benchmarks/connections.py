@@ -0,0 +1,139 @@
+"""
+Бенчмарк стоимости соединений с PostgreSQL.
+
+Повторяет жизненный цикл запроса при CONN_MAX_AGE = 0 (получить
+соединение, выполнить короткий запрос, закрыть) в нескольких потоках
+и сравнивает прямые соединения (django.db.backends.postgresql) с пулом
+foodgram.db_pool на той же базе из DATABASES['default']:
+
+    python -m benchmarks.connections --concurrency 32 --duration 10
+"""
+import argparse
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .api import setup_django
+from .load import percentile
+
+ENGINES = {
+    'direct': 'django.db.backends.postgresql',
+    'pooled': 'foodgram.db_pool',
+}
+
+
+def configure_aliases(pool_size):
+    from django.db import connections
+
+    default = connections.settings['default']
+    databases = {
+        alias: {
+            **default,
+            'ENGINE': engine,
+            'CONN_MAX_AGE': 0,
+            'POOL': {**default.get('POOL', {}), 'MAX_SIZE': pool_size},
+        }
+        for alias, engine in ENGINES.items()
+    }
+    configured = connections.configure_settings(
+        {'default': default, **databases}
+    )
+    for alias in ENGINES:
+        connections.settings[alias] = configured[alias]
+
+
+def worker(alias, query, deadline, stats, lock):
+    from django.db import connections
+
+    latencies = []
+    while time.monotonic() < deadline:
+        started = time.perf_counter()
+        connection = connections[alias]
+        with connection.cursor() as cursor:
+            cursor.execute(query)
+            cursor.fetchall()
+        connection.close()
+        latencies.append(time.perf_counter() - started)
+    with lock:
+        stats.extend(latencies)
+
+
+def run(alias, query, concurrency, duration):
+    stats = []
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(worker, alias, query, deadline, stats, lock)
+            for _ in range(concurrency)
+        ]
+    for future in futures:
+        future.result()
+    elapsed = time.monotonic() - started
+    return {
+        'requests': len(stats),
+        'rps': round(len(stats) / elapsed, 1),
+        'p50_ms': round(statistics.median(stats) * 1000, 2),
+        'p99_ms': round(percentile(stats, 0.99) * 1000, 2),
+    }
+
+
+def pool_stats(alias):
+    """
+    Сводка метрик пула: открытые соединения и среднее ожидание.
+    """
+    from prometheus_client import REGISTRY
+
+    labels = {'alias': alias}
+    opened = REGISTRY.get_sample_value(
+        'foodgram_db_pool_connections_opened_total', labels
+    )
+    waits = REGISTRY.get_sample_value(
+        'foodgram_db_pool_wait_seconds_count', labels
+    )
+    waited = REGISTRY.get_sample_value(
+        'foodgram_db_pool_wait_seconds_sum', labels
+    )
+    return {
+        'opened': int(opened or 0),
+        'mean_wait_ms': round(waited / waits * 1000, 3) if waits else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument(
+        '--pool-size', type=int, default=None,
+        help='MAX_SIZE пула, по умолчанию равен --concurrency.'
+    )
+    parser.add_argument('--query', default='SELECT 1')
+    parser.add_argument('--output', help='Сохранить результаты в JSON.')
+    options = parser.parse_args(argv)
+
+    setup_django()
+    configure_aliases(options.pool_size or options.concurrency)
+    results = {
+        alias: run(alias, options.query, options.concurrency, options.duration)
+        for alias in ENGINES
+    }
+    results['pooled'].update(pool_stats('pooled'))
+    print(f'{"backend":<10}{"rps":>10}{"p50, ms":>10}{"p99, ms":>10}'
+          f'{"opened":>8}{"wait, ms":>10}')
+    for alias, result in results.items():
+        opened = result.get('opened', result['requests'])
+        print(f'{alias:<10}{result["rps"]:>10}{result["p50_ms"]:>10}'
+              f'{result["p99_ms"]:>10}{opened:>8}'
+              f'{result.get("mean_wait_ms")!s:>10}')
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
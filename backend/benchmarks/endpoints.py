@@ -0,0 +1,240 @@
+import base64
+import io
+
+from django.contrib.auth import get_user_model
+from PIL import Image
+from recipes.models import Recipe, RecipeIngredient
+from rest_framework.authtoken.models import Token
+
+from .seed import PASSWORD
+
+User = get_user_model()
+
+
+def make_image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (64, 64), 'orange').save(buffer, 'PNG')
+    return 'data:image/png;base64,' + base64.b64encode(
+        buffer.getvalue()
+    ).decode()
+
+
+class Endpoint:
+    """
+    Сценарий одного запроса к API.
+    url - шаблон, который заполняется идентификаторами из seed().
+    setup и teardown выполняются вне замеров и возвращают данные
+    в исходное состояние, чтобы запрос можно было повторять.
+    non_empty - пустой ответ считается ошибкой: замер пустой выдачи
+    не покажет регрессию.
+    """
+    def __init__(self, name, method, url, data=None, anonymous=False,
+                 setup=None, teardown=None, non_empty=False):
+        self.name = name
+        self.method = method
+        self.url = url
+        self.data = data
+        self.anonymous = anonymous
+        self.setup = setup
+        self.teardown = teardown
+        self.non_empty = non_empty
+
+    def get_data(self, context):
+        return self.data(context) if callable(self.data) else self.data
+
+    def request(self, client, context):
+        response = getattr(client, self.method.lower())(
+            self.url.format(**context),
+            self.get_data(context),
+            format='json'
+        )
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+
+def call(method, url, data=None):
+    """
+    Вспомогательный запрос для setup/teardown.
+    """
+    def run(client, context, response=None):
+        return Endpoint(None, method, url, data).request(client, context)
+    return run
+
+
+def restore_token(client, context, response=None):
+    Token.objects.get_or_create(
+        user=context['user'], defaults={'key': context['token']}
+    )
+
+
+def delete_created(model):
+    def run(client, context, response):
+        model.objects.filter(pk=response.data['id']).delete()
+    return run
+
+
+def delete_created_user(client, context, response):
+    User.objects.filter(pk=response.data['id']).delete()
+
+
+def create_scratch_recipe(client, context):
+    recipe = Recipe.objects.get(pk=context['own_recipe'])
+    ingredients = list(recipe.recipe_ingredient.all())
+    tags = list(recipe.tags.all())
+    recipe.pk = None
+    recipe.save()
+    recipe.tags.set(tags)
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe=recipe,
+            ingredient_id=item.ingredient_id,
+            amount=item.amount
+        )
+        for item in ingredients
+    )
+    context['scratch_recipe'] = recipe.pk
+
+
+def recipe_data(context):
+    return {
+        'ingredients': [{'id': context['ingredient'], 'amount': 10}],
+        'tags': [context['tag']],
+        'name': 'Рецепт бенчмарка',
+        'text': 'Описание',
+        'cooking_time': 15,
+        'image': context['image'],
+    }
+
+
+def recipe_update_data(context):
+    data = recipe_data(context)
+    del data['image']
+    return data
+
+
+ENDPOINTS = (
+    Endpoint(
+        'auth.login', 'POST', '/api/auth/token/login/',
+        {'email': 'bench0@example.com', 'password': PASSWORD},
+        anonymous=True
+    ),
+    Endpoint(
+        'auth.logout', 'POST', '/api/auth/token/logout/',
+        teardown=restore_token
+    ),
+    Endpoint('users.list', 'GET', '/api/users/'),
+    Endpoint('users.list.cursor', 'GET', '/api/users/?cursor='),
+    Endpoint(
+        'users.create', 'POST', '/api/users/',
+        {
+            'email': 'bench-new@example.com',
+            'username': 'bench-new',
+            'first_name': 'Bench',
+            'last_name': 'New',
+            'password': PASSWORD,
+        },
+        anonymous=True,
+        teardown=delete_created_user
+    ),
+    Endpoint('users.retrieve', 'GET', '/api/users/{author}/'),
+    Endpoint('users.me', 'GET', '/api/users/me/'),
+    Endpoint(
+        'users.set_password', 'POST', '/api/users/set_password/',
+        {'new_password': PASSWORD, 'current_password': PASSWORD}
+    ),
+    Endpoint(
+        'users.subscriptions', 'GET',
+        '/api/users/subscriptions/?recipes_limit=3'
+    ),
+    Endpoint(
+        'users.subscribe', 'POST', '/api/users/{author}/subscribe/',
+        teardown=call('DELETE', '/api/users/{author}/subscribe/')
+    ),
+    Endpoint(
+        'users.unsubscribe', 'DELETE',
+        '/api/users/{followed_author}/subscribe/',
+        teardown=call('POST', '/api/users/{followed_author}/subscribe/')
+    ),
+    Endpoint('tags.list', 'GET', '/api/tags/'),
+    Endpoint('tags.retrieve', 'GET', '/api/tags/{tag}/'),
+    Endpoint('ingredients.list', 'GET', '/api/ingredients/'),
+    Endpoint('ingredients.search', 'GET', '/api/ingredients/?name=аб'),
+    Endpoint('ingredients.retrieve', 'GET', '/api/ingredients/{ingredient}/'),
+    Endpoint('recipes.list.anonymous', 'GET', '/api/recipes/', anonymous=True),
+    Endpoint('recipes.list', 'GET', '/api/recipes/'),
+    Endpoint('recipes.list.cursor', 'GET', '/api/recipes/?cursor='),
+    Endpoint('recipes.list.page', 'GET', '/api/recipes/?page=5'),
+    Endpoint(
+        'recipes.list.tags', 'GET',
+        '/api/recipes/?tags={tags[0]}&tags={tags[1]}'
+    ),
+    Endpoint('recipes.list.author', 'GET', '/api/recipes/?author={author}'),
+    Endpoint('recipes.list.favorited', 'GET', '/api/recipes/?is_favorited=1'),
+    Endpoint(
+        'recipes.list.in_cart', 'GET', '/api/recipes/?is_in_shopping_cart=1'
+    ),
+    Endpoint('recipes.search', 'GET', '/api/recipes/?search=рецепт'),
+    Endpoint('recipes.retrieve', 'GET', '/api/recipes/{recipe}/'),
+    Endpoint(
+        'recipes.similar', 'GET', '/api/recipes/{recipe}/similar/',
+        non_empty=True
+    ),
+    Endpoint(
+        'recipes.similar.tags', 'GET',
+        '/api/recipes/{recipe}/similar/?tags={tags[0]}', non_empty=True
+    ),
+    Endpoint(
+        'recipes.pantry', 'GET',
+        '/api/recipes/pantry/?ingredients={pantry}&missing=2', non_empty=True
+    ),
+    Endpoint(
+        'recipes.trending', 'GET', '/api/recipes/trending/', non_empty=True
+    ),
+    Endpoint(
+        'recipes.trending.tags', 'GET',
+        '/api/recipes/trending/?tags={tags[0]}', non_empty=True
+    ),
+    Endpoint(
+        'recipes.create', 'POST', '/api/recipes/', recipe_data,
+        teardown=delete_created(Recipe)
+    ),
+    Endpoint(
+        'recipes.update', 'PATCH', '/api/recipes/{own_recipe}/',
+        recipe_update_data
+    ),
+    Endpoint(
+        'recipes.delete', 'DELETE', '/api/recipes/{scratch_recipe}/',
+        setup=create_scratch_recipe
+    ),
+    Endpoint(
+        'recipes.favorite', 'POST', '/api/recipes/{recipe}/favorite/',
+        teardown=call('DELETE', '/api/recipes/{recipe}/favorite/')
+    ),
+    Endpoint(
+        'recipes.unfavorite', 'DELETE', '/api/recipes/{recipe}/favorite/',
+        setup=call('POST', '/api/recipes/{recipe}/favorite/')
+    ),
+    Endpoint(
+        'recipes.shopping_cart', 'POST',
+        '/api/recipes/{recipe}/shopping_cart/',
+        teardown=call('DELETE', '/api/recipes/{recipe}/shopping_cart/')
+    ),
+    Endpoint(
+        'recipes.shopping_cart.delete', 'DELETE',
+        '/api/recipes/{recipe}/shopping_cart/',
+        setup=call('POST', '/api/recipes/{recipe}/shopping_cart/')
+    ),
+    Endpoint(
+        'recipes.download_shopping_cart', 'GET',
+        '/api/recipes/download_shopping_cart/'
+    ),
+    Endpoint(
+        'recipes.download_shopping_cart.pdf', 'GET',
+        '/api/recipes/download_shopping_cart/?format=pdf'
+    ),
+    Endpoint(
+        'recipes.shopping_cart_export', 'POST',
+        '/api/recipes/shopping_cart_export/', {'file_format': 'csv'}
+    ),
+)
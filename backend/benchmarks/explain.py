@@ -0,0 +1,155 @@
+"""
+Планы запросов горячих эндпоинтов на PostgreSQL.
+
+Наполняет тестовую базу данными заданного масштаба, выполняет каждый
+эндпоинт из benchmarks.endpoints с пустым кешем, захватывает его
+SELECT-запросы и печатает EXPLAIN для каждого. Последовательное чтение
+таблиц больше LARGE_TABLE_ROWS строк отмечается; с --strict оно
+завершает запуск с ошибкой.
+
+    cd backend
+    python -m benchmarks.explain --scale recipes=20000 --scale users=2000
+"""
+import argparse
+import json
+import re
+import sys
+
+from .api import parse_scale, run_once, setup_django
+
+# Последовательное чтение таблиц меньше этого размера - норма.
+LARGE_TABLE_ROWS = 1000
+# Справочники ограничены по размеру: hash join с их полным чтением
+# для PostgreSQL дешевле десятков обращений по первичному ключу.
+REFERENCE_TABLES = {'Tag', 'Ingredient'}
+# iterator() на PostgreSQL выполняет запрос через серверный курсор.
+DECLARE_CURSOR = re.compile(r'^DECLARE .+? CURSOR .*? FOR (SELECT .*)', re.S)
+
+
+def capture(request):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    with CaptureQueriesContext(connection) as captured:
+        response = request()
+    queries = []
+    for query in captured.captured_queries:
+        sql = query['sql'].lstrip()
+        declare = DECLARE_CURSOR.match(sql)
+        if declare:
+            sql = declare.group(1)
+        if sql.upper().startswith('SELECT'):
+            queries.append(sql)
+    return response, queries
+
+
+def get_plan(sql):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def iter_scans(plan):
+    if 'Relation Name' in plan or 'Index Name' in plan:
+        yield (
+            plan['Node Type'],
+            plan.get('Relation Name', ''),
+            plan.get('Index Name')
+        )
+    for child in plan.get('Plans', ()):
+        yield from iter_scans(child)
+
+
+def is_full_scan(node, table, sizes):
+    return (
+        node == 'Seq Scan'
+        and table not in REFERENCE_TABLES
+        and sizes.get(table, 0) > LARGE_TABLE_ROWS
+    )
+
+
+def get_table_sizes():
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+        )
+        return dict(cursor.fetchall())
+
+
+def explain_endpoint(endpoint, context, sizes):
+    """
+    Список (sql, узлы чтения таблиц, есть ли Seq Scan большой таблицы).
+    """
+    from django.core.cache import cache
+
+    cache.clear()
+    report = []
+    for sql in run_once(endpoint, context, capture):
+        scans = list(iter_scans(get_plan(sql)))
+        report.append((sql, scans, any(
+            is_full_scan(node, table, sizes) for node, table, _ in scans
+        )))
+    return report
+
+
+def print_report(name, report, verbose):
+    for sql, scans, flagged in report:
+        marker = '!!' if flagged else '  '
+        nodes = ', '.join(
+            f'{node} {table}'.rstrip() + (f'({index})' if index else '')
+            for node, table, index in scans
+        )
+        print(f'{marker} {name}: {nodes}')
+        if verbose or flagged:
+            print(f'     {sql[:400]}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--scale', action='append')
+    parser.add_argument('--only', action='append')
+    parser.add_argument('--verbose', action='store_true')
+    parser.add_argument('--strict', action='store_true')
+    options = parser.parse_args(argv)
+
+    setup_django()
+    from django.db import connection
+
+    from .endpoints import ENDPOINTS, make_image
+    from .seed import seed
+
+    if connection.vendor != 'postgresql':
+        print('Планы запросов собираются только на PostgreSQL.')
+        return 2
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True
+    )
+    flagged = 0
+    try:
+        context = seed(parse_scale(options.scale))
+        context['image'] = make_image()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        sizes = get_table_sizes()
+        for endpoint in ENDPOINTS:
+            if options.only and not endpoint.name.startswith(
+                tuple(options.only)
+            ):
+                continue
+            report = explain_endpoint(endpoint, context, sizes)
+            print_report(endpoint.name, report, options.verbose)
+            flagged += sum(1 for *_, seq in report if seq)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    return 1 if flagged and options.strict else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,163 @@
+"""
+Нагрузочный бенчмарк горячих эндпоинтов чтения.
+
+Запускает параллельные keep-alive соединения к одному или нескольким
+развернутым серверам и выводит запросы в секунду и перцентили задержки.
+Пример сравнения WSGI и ASGI развертываний:
+
+    python -m benchmarks.load \\
+        --target wsgi=http://localhost:8001 \\
+        --target asgi=http://localhost:8000 \\
+        --concurrency 64 --duration 30
+"""
+import argparse
+import http.client
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlsplit
+
+DEFAULT_PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=6&page=2',
+    '/api/tags/',
+    '/api/ingredients/?name=а',
+)
+
+
+def percentile(values, share):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def resolve_paths(connection, headers, paths):
+    """
+    Добавляет к списку адрес первого рецепта, чтобы нагружать
+    и /api/recipes/{id}/.
+    """
+    connection.request('GET', '/api/recipes/?limit=1', headers=headers)
+    response = connection.getresponse()
+    body = response.read()
+    if response.status != 200:
+        return list(paths)
+    results = json.loads(body).get('results') or []
+    if not results:
+        return list(paths)
+    return list(paths) + [f'/api/recipes/{results[0]["id"]}/']
+
+
+def worker(base_url, headers, paths, deadline, stats, lock):
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+    latencies = []
+    errors = 0
+    position = 0
+    while time.monotonic() < deadline:
+        path = paths[position % len(paths)]
+        position += 1
+        started = time.perf_counter()
+        try:
+            connection.request('GET', path, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = http.client.HTTPConnection(parts.netloc, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if response.status >= 400:
+            errors += 1
+    connection.close()
+    with lock:
+        stats['latencies'].extend(latencies)
+        stats['errors'] += errors
+
+
+def run(base_url, paths, concurrency, duration, token=None):
+    """
+    Нагружает base_url в concurrency потоков в течение duration
+    секунд и возвращает сводку по запросам.
+    """
+    headers = {'Connection': 'keep-alive'}
+    if token:
+        headers['Authorization'] = f'Token {token}'
+    connection = http.client.HTTPConnection(urlsplit(base_url).netloc)
+    paths = resolve_paths(
+        connection, headers, [quote(path, safe='/?=&') for path in paths]
+    )
+    connection.close()
+
+    stats = {'latencies': [], 'errors': 0}
+    lock = threading.Lock()
+    started = time.monotonic()
+    deadline = started + duration
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        futures = [
+            executor.submit(
+                worker, base_url, headers, paths, deadline, stats, lock
+            )
+            for _ in range(concurrency)
+        ]
+    for future in futures:
+        future.result()
+    elapsed = time.monotonic() - started
+    latencies = stats['latencies']
+    return {
+        'url': base_url,
+        'requests': len(latencies),
+        'errors': stats['errors'],
+        'rps': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(statistics.median(latencies) * 1000, 2)
+        if latencies else None,
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+        if latencies else None,
+    }
+
+
+def parse_target(value):
+    name, _, url = value.partition('=')
+    if not url:
+        raise argparse.ArgumentTypeError('Ожидается имя=http://хост:порт')
+    return name, url.rstrip('/')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument(
+        '--target', type=parse_target, action='append', required=True,
+        help='Имя и адрес развертывания, например asgi=http://localhost:8000'
+    )
+    parser.add_argument('--path', action='append', dest='paths')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--token', help='Токен для авторизованных запросов.')
+    parser.add_argument('--output', help='Сохранить результаты в JSON.')
+    options = parser.parse_args(argv)
+
+    results = {}
+    for name, url in options.target:
+        results[name] = run(
+            url,
+            options.paths or DEFAULT_PATHS,
+            options.concurrency,
+            options.duration,
+            options.token
+        )
+    print(f'{"target":<10}{"rps":>10}{"p50, ms":>10}{"p99, ms":>10}'
+          f'{"errors":>8}')
+    for name, result in results.items():
+        print(f'{name:<10}{result["rps"]:>10}{result["p50_ms"]!s:>10}'
+              f'{result["p99_ms"]!s:>10}{result["errors"]:>8}')
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
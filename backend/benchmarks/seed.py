@@ -0,0 +1,153 @@
+import os
+import random
+
+from accounts.models import Follow
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from recipes.counters import rebuild_counters
+from recipes.models import (Favorite, Ingredient, Purchase, Recipe,
+                            RecipeIngredient, Tag)
+from recipes.reference_data import (DEFAULT_FILES, get_reference,
+                                    load_reference)
+from recipes.trending import rebuild_scores
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+PASSWORD = 'bench-password-1'
+
+DEFAULT_SCALE = {
+    'users': 50,
+    'recipes': 500,
+    'ingredients_per_recipe': 8,
+    'tags_per_recipe': 2,
+    'favorites': 20,
+    'follows': 10,
+    'cart': 10,
+}
+
+
+def load_reference_data():
+    for path in DEFAULT_FILES:
+        load_reference(
+            os.path.join(settings.BASE_DIR, path), get_reference(path)
+        )
+
+
+def create_users(count):
+    password = make_password(PASSWORD)
+    User.objects.bulk_create(
+        User(
+            email=f'bench{num}@example.com',
+            username=f'bench{num}',
+            first_name='Bench',
+            last_name=f'User{num}',
+            password=password
+        )
+        for num in range(count)
+    )
+    return list(User.objects.filter(
+        username__startswith='bench'
+    ).order_by('id').values_list('id', flat=True))
+
+
+def create_recipes(scale, user_ids, rnd):
+    ingredient_ids = list(Ingredient.objects.values_list('id', flat=True))
+    tag_ids = list(Tag.objects.values_list('id', flat=True))
+    Recipe.objects.bulk_create(
+        Recipe(
+            author_id=user_ids[num % len(user_ids)],
+            name=f'Рецепт {num}',
+            text='Описание рецепта для бенчмарка.',
+            cooking_time=rnd.randint(1, 120),
+            image='recipes/images/bench.png'
+        )
+        for num in range(scale['recipes'])
+    )
+    recipe_ids = list(Recipe.objects.values_list('id', flat=True))
+    RecipeIngredient.objects.bulk_create(
+        RecipeIngredient(
+            recipe_id=recipe_id,
+            ingredient_id=ingredient_id,
+            amount=rnd.randint(1, 500)
+        )
+        for recipe_id in recipe_ids
+        for ingredient_id in rnd.sample(
+            ingredient_ids,
+            min(scale['ingredients_per_recipe'], len(ingredient_ids))
+        )
+    )
+    Recipe.tags.through.objects.bulk_create(
+        Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+        for recipe_id in recipe_ids
+        for tag_id in rnd.sample(
+            tag_ids, min(scale['tags_per_recipe'], len(tag_ids))
+        )
+    )
+    return recipe_ids
+
+
+def create_relations(model, field, per_user, user_ids, target_ids, rnd):
+    model.objects.bulk_create(
+        model(user_id=user_id, **{f'{field}_id': target_id})
+        for user_id in user_ids
+        for target_id in rnd.sample(
+            [pk for pk in target_ids if pk != user_id],
+            min(per_user, len(target_ids) - 1)
+        )
+    )
+
+
+def seed(scale=None, random_seed=0):
+    """
+    Синтетические данные заданного масштаба поверх справочников.
+    favorites, follows и cart задаются на одного пользователя.
+    Возвращает идентификаторы, которые используют сценарии бенчмарка.
+    """
+    scale = {**DEFAULT_SCALE, **(scale or {})}
+    rnd = random.Random(random_seed)
+    load_reference_data()
+    user_ids = create_users(scale['users'])
+    recipe_ids = create_recipes(scale, user_ids, rnd)
+    create_relations(
+        Favorite, 'recipe', scale['favorites'], user_ids, recipe_ids, rnd
+    )
+    create_relations(
+        Purchase, 'recipe', scale['cart'], user_ids, recipe_ids, rnd
+    )
+    create_relations(
+        Follow, 'author', scale['follows'], user_ids, user_ids, rnd
+    )
+    rebuild_counters()
+    rebuild_scores()
+
+    user = User.objects.get(pk=user_ids[0])
+    busy = set(Favorite.objects.filter(user=user).values_list(
+        'recipe', flat=True
+    )) | set(Purchase.objects.filter(user=user).values_list(
+        'recipe', flat=True
+    )) | set(Recipe.objects.filter(author=user).values_list(
+        'id', flat=True
+    ))
+    followed = set(Follow.objects.filter(user=user).values_list(
+        'author', flat=True
+    ))
+    recipe_id = next(pk for pk in recipe_ids if pk not in busy)
+    return {
+        'scale': scale,
+        'user': user,
+        'token': Token.objects.create(user=user).key,
+        'recipe': recipe_id,
+        'own_recipe': Recipe.objects.filter(author=user).first().pk,
+        'author': next(pk for pk in user_ids[1:] if pk not in followed),
+        'followed_author': next(iter(followed)),
+        'ingredient': Ingredient.objects.order_by('name').first().pk,
+        'pantry': ','.join(map(str, RecipeIngredient.objects.filter(
+            recipe_id=recipe_id
+        ).values_list('ingredient_id', flat=True))),
+        'tags': list(Tag.objects.order_by('id').values_list(
+            'slug', flat=True
+        )[:2]),
+        'tag': Tag.objects.order_by('id').first().pk,
+    }
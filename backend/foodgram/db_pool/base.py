@@ -0,0 +1,57 @@
+import os
+
+from django.db.backends.postgresql import base, creation
+
+from .pool import close_pools, get_pool
+
+# Без POOL в настройках процесс держит одно соединение, как и
+# стандартный бэкенд; размер для gunicorn считается в settings.py.
+DEFAULT_POOL_OPTIONS = {
+    'MIN_SIZE': 1,
+    'MAX_SIZE': 1,
+    'TIMEOUT': 10,
+    'MAX_LIFETIME': 30 * 60,
+    'CHECK_IDLE_AFTER': 30,
+}
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        close_pools(self.connection.alias)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    Бэкенд PostgreSQL, берущий соединения из пула процесса
+    (настройки в DATABASES[alias]['POOL']). Закрытие соединения
+    Django возвращает его в пул, поэтому CONN_MAX_AGE оставляется 0:
+    временем жизни управляет пул.
+    """
+    creation_class = DatabaseCreation
+
+    def get_pool_options(self):
+        return {**DEFAULT_POOL_OPTIONS, **self.settings_dict.get('POOL', {})}
+
+    def open_connection(self, conn_params):
+        connection = super().get_new_connection(conn_params)
+        return connection, self.isolation_level
+
+    def get_new_connection(self, conn_params):
+        def connect():
+            return self.open_connection(conn_params)
+
+        self.pool = get_pool(
+            self.alias, conn_params, self.get_pool_options(), connect
+        )
+        pooled = self.pool.checkout(connect)
+        self.isolation_level = pooled.isolation_level
+        return pooled.connection
+
+    def _close(self):
+        if self.connection is None:
+            return
+        if self.pool.pid != os.getpid():
+            return
+        with self.wrap_database_errors:
+            self.pool.release(self.connection)
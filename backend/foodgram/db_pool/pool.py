@@ -0,0 +1,233 @@
+import os
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from foodgram import metrics
+from psycopg2 import extensions
+
+
+class PooledConnection:
+    """
+    Соединение пула и его служебные отметки.
+    """
+    def __init__(self, connection, isolation_level):
+        self.connection = connection
+        self.isolation_level = isolation_level
+        self.created = time.monotonic()
+        self.released = self.created
+
+
+class ConnectionPool:
+    """
+    Пул соединений psycopg2 одного процесса для одного алиаса БД.
+    Хранит от MIN_SIZE до MAX_SIZE соединений; при выдаче соединение
+    проверяется (открыто, вне транзакции, не старше MAX_LIFETIME, после
+    простоя дольше CHECK_IDLE_AFTER выполняется SELECT 1). Время
+    ожидания свободного соединения пишется в метрики.
+    """
+    def __init__(self, alias, options):
+        self.alias = alias
+        self.pid = os.getpid()
+        self.min_size = options['MIN_SIZE']
+        self.max_size = options['MAX_SIZE']
+        self.timeout = options['TIMEOUT']
+        self.max_lifetime = options['MAX_LIFETIME']
+        self.check_idle_after = options['CHECK_IDLE_AFTER']
+        self.idle = deque()
+        self.in_use = {}
+        self.size = 0
+        self.condition = threading.Condition()
+
+    @staticmethod
+    def open(connect):
+        connection, isolation_level = connect()
+        return PooledConnection(connection, isolation_level)
+
+    def discard(self, pooled):
+        try:
+            pooled.connection.close()
+        except psycopg2.Error:
+            pass
+
+    def is_healthy(self, pooled):
+        if pooled.connection.closed:
+            return False
+        if time.monotonic() - pooled.created > self.max_lifetime:
+            return False
+        status = pooled.connection.get_transaction_status()
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            return False
+        if time.monotonic() - pooled.released < self.check_idle_after:
+            return True
+        try:
+            # Вне autocommit SELECT 1 открыл бы транзакцию, и Django
+            # получил бы соединение в состоянии INTRANS.
+            pooled.connection.autocommit = True
+            with pooled.connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+        except psycopg2.Error:
+            return False
+        return True
+
+    def reserve(self):
+        """
+        Берет свободное соединение или место под новое, при их
+        отсутствии ждет до TIMEOUT секунд.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self.condition:
+            while not self.idle and self.size >= self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise psycopg2.OperationalError(
+                        f'Пул соединений {self.alias} исчерпан: '
+                        f'{self.max_size} соединений заняты дольше '
+                        f'{self.timeout} с.'
+                    )
+                self.condition.wait(remaining)
+            if self.idle:
+                return self.idle.pop()
+            self.size += 1
+            return None
+
+    def checkout(self, connect):
+        """
+        Выдает проверенное соединение; connect() открывает новое
+        и возвращает его вместе с уровнем изоляции.
+        """
+        started = time.monotonic()
+        try:
+            while True:
+                pooled = self.reserve()
+                if pooled is None:
+                    pooled = self.open_reserved(connect)
+                    break
+                if self.is_healthy(pooled):
+                    break
+                self.forget(pooled)
+        finally:
+            metrics.DB_POOL_WAIT.labels(self.alias).observe(
+                time.monotonic() - started
+            )
+        self.in_use[id(pooled.connection)] = pooled
+        return pooled
+
+    def open_reserved(self, connect):
+        try:
+            pooled = self.open(connect)
+        except Exception:
+            self.forget(None)
+            raise
+        metrics.DB_POOL_CONNECTIONS.labels(self.alias).inc()
+        return pooled
+
+    def forget(self, pooled):
+        """
+        Закрывает соединение и освобождает его место в пуле.
+        """
+        if pooled is not None:
+            self.discard(pooled)
+        with self.condition:
+            self.size -= 1
+            self.condition.notify()
+
+    def release(self, connection):
+        """
+        Возвращает соединение в пул, откатив незавершенную транзакцию.
+        Сломанные и устаревшие соединения закрываются.
+        """
+        pooled = self.in_use.pop(id(connection), None)
+        if pooled is None:
+            connection.close()
+            return
+        expired = time.monotonic() - pooled.created > self.max_lifetime
+        if expired or not self.reset(connection):
+            self.forget(pooled)
+            return
+        pooled.released = time.monotonic()
+        with self.condition:
+            self.idle.append(pooled)
+            self.condition.notify()
+
+    @staticmethod
+    def reset(connection):
+        """
+        Откатывает незавершенную транзакцию и возвращает режим
+        autocommit, в котором соединение выдает Django: иначе проверка
+        SELECT 1 при следующей выдаче открыла бы транзакцию.
+        False, если соединение после этого непригодно.
+        """
+        if connection.closed:
+            return False
+        try:
+            if (
+                connection.get_transaction_status()
+                != extensions.TRANSACTION_STATUS_IDLE
+            ):
+                connection.rollback()
+            connection.autocommit = True
+        except psycopg2.Error:
+            return False
+        return (
+            connection.get_transaction_status()
+            == extensions.TRANSACTION_STATUS_IDLE
+        )
+
+    def close(self):
+        with self.condition:
+            while self.idle:
+                self.discard(self.idle.pop())
+                self.size -= 1
+
+    def fill(self, connect):
+        """
+        Открывает соединения до MIN_SIZE.
+        """
+        while self.size < self.min_size:
+            with self.condition:
+                self.size += 1
+            pooled = self.open_reserved(connect)
+            pooled.released = time.monotonic()
+            with self.condition:
+                self.idle.appendleft(pooled)
+                self.condition.notify()
+
+
+pools = {}
+pools_lock = threading.Lock()
+
+
+def get_pool(alias, conn_params, options, connect):
+    """
+    Пул для алиаса и параметров подключения в текущем процессе.
+    После fork дочерний процесс создает свой пул: сокеты родителя
+    не используются и не закрываются.
+    """
+    params = sorted(
+        (name, str(value)) for name, value in conn_params.items()
+    )
+    key = (alias, os.getpid(), tuple(params))
+    pool = pools.get(key)
+    if pool is None:
+        with pools_lock:
+            pool = pools.get(key)
+            if pool is None:
+                pool = ConnectionPool(alias, options)
+                pool.fill(connect)
+                pools[key] = pool
+    return pool
+
+
+def close_pools(alias):
+    """
+    Закрывает свободные соединения и удаляет пулы алиаса текущего
+    процесса, например перед удалением тестовой базы.
+    """
+    with pools_lock:
+        keys = [
+            key for key in pools if key[:2] == (alias, os.getpid())
+        ]
+        for key in keys:
+            pools.pop(key).close()
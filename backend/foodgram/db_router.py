@@ -0,0 +1,119 @@
+import contextvars
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from foodgram import metrics
+
+current_read_db = contextvars.ContextVar('read_db', default=None)
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+replica_status = {}
+
+
+class ReplicaRouter:
+    """
+    Чтение идет в БД, выбранную для текущего запроса (current_read_db),
+    по умолчанию в основную. Запись всегда в основную, в том числе
+    для объектов, прочитанных с реплики. Реплики не мигрируются:
+    они повторяют основную базу.
+    """
+    def db_for_read(self, model, **hints):
+        return current_read_db.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.READ_REPLICAS['ALIASES']:
+            return False
+        return None
+
+
+def get_replica_lag(alias):
+    """
+    Отставание реплики в секундах. Для не-PostgreSQL реплик (SQLite
+    в локальной проверке) проверяется только доступность.
+    """
+    connection = connections[alias]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            LAG_SQL if connection.vendor == 'postgresql' else 'SELECT 0'
+        )
+        lag = cursor.fetchone()[0]
+    return float(lag or 0)
+
+
+def is_replica_usable(alias):
+    """
+    Доступна ли реплика и не отстает ли больше MAX_LAG_SECONDS.
+    Результат проверки живет LAG_CHECK_INTERVAL секунд.
+    """
+    config = settings.READ_REPLICAS
+    now = time.monotonic()
+    checked_at, usable = replica_status.get(alias, (None, False))
+    if checked_at is not None and (
+        now - checked_at < config['LAG_CHECK_INTERVAL']
+    ):
+        return usable
+    try:
+        usable = get_replica_lag(alias) <= config['MAX_LAG_SECONDS']
+    except DatabaseError:
+        usable = False
+    replica_status[alias] = (now, usable)
+    return usable
+
+
+def choose_read_db():
+    """
+    Случайная пригодная реплика или основная БД, если таких нет.
+    """
+    replicas = [
+        alias for alias in settings.READ_REPLICAS['ALIASES']
+        if is_replica_usable(alias)
+    ]
+    alias = random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+    metrics.DB_READ_ROUTING.labels(alias).inc()
+    return alias
+
+
+def get_pin_key(user_id):
+    return f'primary_pin:{user_id}'
+
+
+def pin_to_primary(user):
+    """
+    После записи пользователь читает из основной БД STICKY_SECONDS
+    секунд, чтобы видеть свои изменения до их прихода на реплики.
+    Закрепление хранится в общем кеше (CACHE_SHARED), иначе другие
+    процессы его не увидят.
+    """
+    if settings.CACHE_SHARED:
+        cache.set(
+            get_pin_key(user.pk), True,
+            settings.READ_REPLICAS['STICKY_SECONDS']
+        )
+
+
+def is_pinned_to_primary(user):
+    """
+    Без общего кеша закрепление другого процесса не видно, поэтому
+    авторизованные пользователи всегда читают из основной БД.
+    """
+    if not user.is_authenticated:
+        return False
+    if not settings.CACHE_SHARED:
+        return True
+    return cache.get(get_pin_key(user.pk), False)
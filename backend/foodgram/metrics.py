@@ -0,0 +1,78 @@
+import os
+
+from django.http import HttpResponse
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY,
+                               CollectorRegistry, Counter, Histogram,
+                               generate_latest, multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'foodgram_request_duration_seconds',
+    'Длительность обработки запроса.',
+    ['view', 'method', 'status'],
+    buckets=(
+        0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75,
+        1.0, 2.5, 5.0, 10.0
+    )
+)
+REQUEST_QUERIES = Histogram(
+    'foodgram_request_db_queries',
+    'Число запросов к БД за один HTTP-запрос.',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+)
+RESPONSE_SIZE = Histogram(
+    'foodgram_response_size_bytes',
+    'Размер тела ответа.',
+    ['view'],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+)
+CACHE_REQUESTS = Counter(
+    'foodgram_cache_requests_total',
+    'Обращения к кешам приложения.',
+    ['cache', 'result']
+)
+
+DB_POOL_WAIT = Histogram(
+    'foodgram_db_pool_wait_seconds',
+    'Ожидание соединения из пула БД, включая проверку и открытие.',
+    ['alias'],
+    buckets=(
+        0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+        0.5, 1.0, 2.5, 5.0, 10.0
+    )
+)
+DB_POOL_CONNECTIONS = Counter(
+    'foodgram_db_pool_connections_opened_total',
+    'Новые соединения, открытые пулом БД.',
+    ['alias']
+)
+
+DB_READ_ROUTING = Counter(
+    'foodgram_db_read_routing_total',
+    'Выбор БД для чтения в запросах к представлениям с репликами.',
+    ['alias']
+)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def get_registry():
+    """
+    В многопроцессном режиме (задан PROMETHEUS_MULTIPROC_DIR) метрики
+    всех воркеров gunicorn собираются из файлов каталога, иначе
+    отдается реестр текущего процесса.
+    """
+    if not os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def metrics_view(request):
+    return HttpResponse(
+        generate_latest(get_registry()),
+        content_type=CONTENT_TYPE_LATEST
+    )
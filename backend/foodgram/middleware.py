@@ -0,0 +1,246 @@
+import asyncio
+import contextvars
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from foodgram import metrics
+
+logger = logging.getLogger(__name__)
+
+current_profile = contextvars.ContextVar('sql_profile', default=None)
+
+PLACEHOLDER_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)*\s*\)')
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_sql(sql):
+    """
+    Приводит запросы, отличающиеся только длиной списка IN (...),
+    к одному виду.
+    """
+    return WHITESPACE.sub(' ', PLACEHOLDER_LIST.sub('(...)', sql)).strip()
+
+
+class RequestProfile:
+    """
+    Запросы к БД одного HTTP-запроса и отметки времени.
+    """
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = []
+        self.render_started = None
+        self.render_time = 0.0
+
+    @property
+    def db_time(self):
+        return sum(duration for _, duration in self.queries)
+
+    def repeated(self, threshold):
+        counts = Counter(normalize_sql(sql) for sql, _ in self.queries)
+        return {
+            sql: count for sql, count in counts.items() if count > threshold
+        }
+
+
+def track_query(execute, sql, params, many, context):
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.queries.append((sql, time.perf_counter() - started))
+
+
+def install_query_tracker(connection, **kwargs):
+    if track_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_query)
+
+
+def install_query_trackers():
+    connection_created.connect(install_query_tracker)
+    for connection in connections.all():
+        install_query_tracker(connection)
+
+
+@contextmanager
+def request_profile():
+    """
+    Профиль текущего запроса; если внешний middleware уже начал
+    профиль, используется он, чтобы запросы не делились между двумя.
+    """
+    profile = current_profile.get()
+    if profile is not None:
+        yield profile
+        return
+    profile = RequestProfile()
+    token = current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        current_profile.reset(token)
+
+
+@contextmanager
+def render_timer():
+    """
+    Добавляет время рендеринга ответа к профилю текущего запроса.
+    Нужен там, где ответ рендерится до process_template_response,
+    как в асинхронном пути чтения (api.async_views).
+    """
+    profile = current_profile.get()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        if profile is not None:
+            profile.render_time += time.perf_counter() - started
+
+
+class SQLProfilerMiddleware:
+    """
+    Считает запросы и время БД по каждому HTTP-запросу, ищет
+    повторяющиеся запросы (N+1), пишет медленные запросы в лог и
+    добавляет заголовок Server-Timing (db, app, render, total).
+    При SQL_PROFILER['ENABLED'] = False исключается из цепочки
+    при запуске и ничего не стоит.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.config = settings.SQL_PROFILER
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        install_query_trackers()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        with request_profile() as profile:
+            response = self.get_response(request)
+        return self.finish(request, response, profile)
+
+    async def __acall__(self, request):
+        with request_profile() as profile:
+            response = await self.get_response(request)
+        return self.finish(request, response, profile)
+
+    def process_template_response(self, request, response):
+        profile = current_profile.get()
+        if profile is not None and not response.is_rendered:
+            profile.render_started = time.perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: self.render_finished(profile)
+            )
+        return response
+
+    @staticmethod
+    def render_finished(profile):
+        profile.render_time = time.perf_counter() - profile.render_started
+
+    def finish(self, request, response, profile):
+        total = (time.perf_counter() - profile.started) * 1000
+        db = profile.db_time * 1000
+        render = profile.render_time * 1000
+        if self.config['SERVER_TIMING']:
+            response['Server-Timing'] = (
+                f'db;dur={db:.1f};desc="{len(profile.queries)} queries", '
+                f'app;dur={max(total - db - render, 0):.1f}, '
+                f'render;dur={render:.1f}, '
+                f'total;dur={total:.1f}'
+            )
+        repeated = profile.repeated(self.config['N_PLUS_ONE_THRESHOLD'])
+        if repeated or total > self.config['SLOW_REQUEST_MS']:
+            self.log(request, profile, total, db, repeated)
+        return response
+
+    def log(self, request, profile, total, db, repeated):
+        slow_query = self.config['SLOW_QUERY_MS'] / 1000
+        lines = [
+            f'{request.method} {request.get_full_path()}: {total:.1f} ms, '
+            f'{len(profile.queries)} queries, db {db:.1f} ms'
+        ]
+        lines.extend(
+            f'  N+1 x{count}: {sql}' for sql, count in repeated.items()
+        )
+        lines.extend(
+            f'  slow {duration * 1000:.1f} ms: {normalize_sql(sql)}'
+            for sql, duration in profile.queries
+            if duration > slow_query
+        )
+        logger.warning('\n'.join(lines))
+
+
+class MetricsMiddleware:
+    """
+    Пишет в реестр метрик длительность, число запросов к БД и размер
+    ответа по каждому действию представления (RecipeViewSet.list,
+    RecipeViewSet.favorite и т.д.). При METRICS['ENABLED'] = False
+    исключается из цепочки.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        install_query_trackers()
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        with request_profile() as profile:
+            response = self.get_response(request)
+        self.observe(request, response, profile, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        with request_profile() as profile:
+            response = await self.get_response(request)
+        self.observe(request, response, profile, started)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics_view = get_view_name(request, view_func)
+
+    @staticmethod
+    def observe(request, response, profile, started):
+        view = getattr(request, 'metrics_view', 'unresolved')
+        metrics.REQUEST_LATENCY.labels(
+            view, request.method, response.status_code
+        ).observe(time.perf_counter() - started)
+        metrics.REQUEST_QUERIES.labels(view).observe(len(profile.queries))
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.labels(view).observe(len(response.content))
+
+
+def get_view_name(request, view_func):
+    """
+    Имя действия для метки метрик: Класс.действие для ViewSet,
+    Класс для остальных представлений DRF, имя маршрута для прочих.
+    """
+    view_class = getattr(view_func, 'cls', None)
+    if view_class is None:
+        return request.resolver_match.view_name
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    if action is None:
+        return view_class.__name__
+    return f'{view_class.__name__}.{action}'
@@ -19,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'django_filters',
     'rest_framework.authtoken',
@@ -26,10 +27,13 @@ INSTALLED_APPS = [
     'djoser',
     'accounts',
     'api',
+    'jobs',
     'recipes'
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.SQLProfilerMiddleware',
+    'foodgram.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +43,10 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Покрывающие индексы (include) есть только в PostgreSQL,
+# на остальных СУБД создаются обычные индексы.
+SILENCED_SYSTEM_CHECKS = ['models.W040']
+
 ROOT_URLCONF = 'foodgram.urls'
 
 TEMPLATES = [
@@ -58,17 +66,56 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+
+# Число процессов gunicorn (выставляет gunicorn.conf.py) и сколько
+# соединений с PostgreSQL на всех них можно открыть, с запасом
+# до max_connections (100 по умолчанию) для воркеров задач и админов.
+WEB_WORKERS = int(os.getenv('GUNICORN_WORKERS', default=1))
+DB_CONNECTIONS = int(os.getenv('DB_CONNECTIONS', default=80))
+
 DATABASES = {
     'default': {
-        'ENGINE': os.getenv('DB_ENGINE', default='django.db.backends.postgresql'),
+        'ENGINE': os.getenv('DB_ENGINE', default='foodgram.db_pool'),
         'NAME': os.getenv('DB_NAME', default='postgres'),
         'USER': os.getenv('POSTGRES_USER', default='postgres'),
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
         'HOST': os.getenv('DB_HOST', default='db'),
-        'PORT': os.getenv('DB_PORT', default='5432')
+        'PORT': os.getenv('DB_PORT', default='5432'),
+        'POOL': {
+            'MIN_SIZE': int(os.getenv('DB_POOL_MIN_SIZE', default=1)),
+            'MAX_SIZE': int(os.getenv('DB_POOL_MAX_SIZE', default=max(1, DB_CONNECTIONS // WEB_WORKERS))),
+            'TIMEOUT': float(os.getenv('DB_POOL_TIMEOUT', default=10)),
+            'MAX_LIFETIME': int(os.getenv('DB_POOL_MAX_LIFETIME', default=30 * 60)),
+            'CHECK_IDLE_AFTER': int(os.getenv('DB_POOL_CHECK_IDLE_AFTER', default=30)),
+        },
     }
 }
 
+DB_REPLICAS = [
+    replica for replica in os.getenv('DB_REPLICAS', default='').split(',')
+    if replica
+]
+for number, replica in enumerate(DB_REPLICAS, start=1):
+    if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+        location = {'NAME': replica}
+    else:
+        host, _, port = replica.partition(':')
+        location = {'HOST': host, 'PORT': port or DATABASES['default']['PORT']}
+    DATABASES[f'replica_{number}'] = {
+        **DATABASES['default'],
+        **location,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+
+READ_REPLICAS = {
+    'ALIASES': [f'replica_{number}' for number in range(1, len(DB_REPLICAS) + 1)],
+    'STICKY_SECONDS': int(os.getenv('DB_REPLICA_STICKY_SECONDS', default=15)),
+    'MAX_LAG_SECONDS': float(os.getenv('DB_REPLICA_MAX_LAG', default=5)),
+    'LAG_CHECK_INTERVAL': 5,
+}
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -102,18 +149,148 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Выгрузки списков покупок: вне MEDIA_ROOT, отдаются только владельцу.
+SHOPPING_LIST_EXPORT_ROOT = os.getenv(
+    'SHOPPING_LIST_EXPORT_ROOT', default=os.path.join(BASE_DIR, 'exports')
+)
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+BASIC_AUTH_ENABLED = os.getenv('BASIC_AUTH', default='0') == '1'
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
-        'rest_framework.authentication.BasicAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+        *(
+            ['rest_framework.authentication.BasicAuthentication']
+            if BASIC_AUTH_ENABLED else []
+        ),
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.pagination.CustomPagination',
     'DEFAULT_FILTER_BACKENDS': ['django_filters.rest_framework.DjangoFilterBackend']
 }
 
+REDIS_URL = os.getenv('REDIS_URL')
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default=(
+                'django_redis.cache.RedisCache' if REDIS_URL
+                else 'django.core.cache.backends.locmem.LocMemCache'
+            )
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=REDIS_URL or 'foodgram'),
+    }
+}
+
+# Кеши, которые сбрасываются сигналами, работают только с кешем, общим
+# для всех процессов: сброс в памяти одного воркера gunicorn не виден
+# остальным и контейнеру worker. С кешем процесса данные читаются из БД.
+CACHE_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+REFERENCE_CACHE_REDIS_URL = os.getenv('REFERENCE_CACHE_REDIS_URL', default=REDIS_URL)
+REFERENCE_CACHE = {
+    'BACKEND': 'api.cache.DatabaseVersionStore',
+    'OPTIONS': {},
+    'MAX_ENTRIES': 1024,
+    'TIMEOUT': 5 * 60,
+    'VERSION_TIMEOUT': 2,
+}
+if REFERENCE_CACHE_REDIS_URL:
+    REFERENCE_CACHE.update({
+        'BACKEND': 'api.cache.RedisVersionStore',
+        'OPTIONS': {'url': REFERENCE_CACHE_REDIS_URL},
+    })
+
+RECIPE_SEARCH = {
+    'BACKEND': (
+        'api.search.PostgresRecipeSearch'
+        if DATABASES['default']['ENGINE'] in (
+            'django.db.backends.postgresql', 'foodgram.db_pool'
+        )
+        else 'api.search.SimpleRecipeSearch'
+    ),
+    'CONFIG': 'russian',
+    # Без явного RECIPE_SEARCH_TRIGRAM=1/0 нечеткий поиск включается,
+    # если в БД установлено расширение pg_trgm.
+    'TRIGRAM': {'1': True, '0': False}.get(os.getenv('RECIPE_SEARCH_TRIGRAM')),
+}
+
+RECIPE_INDEX = {
+    'MAX_CHANGES': 1000,
+    'CHANGES_TIMEOUT': 60 * 60 * 24,
+    'LIMIT': 6,
+    'MAX_LIMIT': 50,
+    'MAX_MISSING': 10,
+}
+
+TRENDING = {
+    'HALF_LIFE': int(os.getenv('TRENDING_HALF_LIFE_HOURS', default=24)) * 60 * 60,
+    'DECAY_INTERVAL': 10 * 60,
+    'WEIGHTS': {'favorite': 1.0, 'purchase': 2.0},
+    'MIN_SCORE': 0.01,
+}
+
+RECIPE_IMAGE = {
+    'MAX_UPLOAD_SIZE': 5 * 1024 * 1024,
+    'MAX_PIXELS': 40_000_000,
+    'ALLOWED_FORMATS': ('JPEG', 'PNG', 'GIF', 'WEBP'),
+    'VARIANTS': {
+        'card': (480, 480),
+        'detail': (1200, 1200),
+    },
+    'FORMAT': os.getenv('RECIPE_IMAGE_FORMAT', default='WEBP'),
+    'QUALITY': 80,
+}
+
+METRICS = {
+    'ENABLED': os.getenv('METRICS', default='1') == '1',
+}
+
+SQL_PROFILER = {
+    'ENABLED': os.getenv('SQL_PROFILER', default='0') == '1',
+    'SERVER_TIMING': True,
+    'N_PLUS_ONE_THRESHOLD': int(os.getenv('SQL_PROFILER_N_PLUS_ONE', default=5)),
+    'SLOW_REQUEST_MS': int(os.getenv('SQL_PROFILER_SLOW_REQUEST_MS', default=500)),
+    'SLOW_QUERY_MS': int(os.getenv('SQL_PROFILER_SLOW_QUERY_MS', default=100)),
+}
+
+ASYNC_READ = {
+    'ENABLED': os.getenv('ASYNC_READ_PATH', default='0') == '1',
+    'THREADS': int(os.getenv('ASYNC_READ_THREADS', default=16)),
+}
+
+JOBS = {
+    'EAGER': os.getenv('JOBS_EAGER', default='0') == '1',
+    'PROCESSES': int(os.getenv('JOBS_PROCESSES', default=2)),
+    'POLL_INTERVAL': 1.0,
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BACKOFF': 5,
+    'LEASE': 10 * 60,
+    'PERIODIC': {
+        'recipes.decay_trending_scores': TRENDING['DECAY_INTERVAL'],
+    },
+    'PERIODIC_RETENTION': 60 * 60 * 24,
+}
+
 EMAIL_LENGTH = 254
 NAME_LENGTH = 150
 PAGE_SIZE = 6
+SHOPPING_CART_CACHE_TIMEOUT = 60 * 60 * 24
+USER_STATE_CACHE_TIMEOUT = 60 * 60 * 24
+AUTH_TOKEN_CACHE = {
+    'TIMEOUT': 60 * 5,
+    'LOCAL_TIMEOUT': 5,
+    'MAX_ENTRIES': 10000,
+}
+SHOPPING_LIST_CHUNK_SIZE = 8192
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    'SHOPPING_LIST_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf'
+)
@@ -0,0 +1,90 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import SimpleTestCase
+from psycopg2 import extensions
+
+from .db_pool.base import DEFAULT_POOL_OPTIONS
+from .db_pool.pool import ConnectionPool
+
+IDLE = extensions.TRANSACTION_STATUS_IDLE
+INTRANS = extensions.TRANSACTION_STATUS_INTRANS
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute(self, sql, params=None):
+        if not self.connection.autocommit:
+            self.connection.status = INTRANS
+
+
+class FakeConnection:
+    """
+    Поведение psycopg2, важное для пула: вне autocommit любой запрос
+    открывает транзакцию, autocommit меняется только вне транзакции.
+    """
+    closed = 0
+
+    def __init__(self):
+        self._autocommit = False
+        self.status = IDLE
+
+    @property
+    def autocommit(self):
+        return self._autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        assert self.status == IDLE, 'autocommit внутри транзакции'
+        self._autocommit = value
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.status = IDLE
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def close(self):
+        self.closed = 1
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    def get_pool(self, connect):
+        pool = ConnectionPool('test', {
+            **DEFAULT_POOL_OPTIONS, 'CHECK_IDLE_AFTER': 0
+        })
+        self.addCleanup(pool.close)
+        return pool, lambda: (connect(), None)
+
+    def assert_returns_idle(self, connect):
+        pool, connect = self.get_pool(connect)
+        first = pool.checkout(connect).connection
+        first.autocommit = False
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertEqual(first.get_transaction_status(), INTRANS)
+        pool.release(first)
+        self.assertEqual(first.get_transaction_status(), IDLE)
+        self.assertTrue(first.autocommit)
+        second = pool.checkout(connect).connection
+        self.assertIs(second, first)
+        self.assertEqual(second.get_transaction_status(), IDLE)
+
+    def test_released_connection_comes_back_idle(self):
+        self.assert_returns_idle(FakeConnection)
+
+    @skipUnless(connection.vendor == 'postgresql', 'нужен PostgreSQL')
+    def test_released_postgresql_connection_comes_back_idle(self):
+        params = connection.get_connection_params()
+        self.assert_returns_idle(lambda: connection.Database.connect(**params))
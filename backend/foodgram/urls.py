@@ -3,6 +3,7 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 from foodgram import settings
+from foodgram.metrics import metrics_view
 
 urlpatterns = [
     path('api/', include('api.urls')),
@@ -14,6 +15,9 @@ urlpatterns = [
     ),
 ]
 
+if settings.METRICS['ENABLED']:
+    urlpatterns.append(path('metrics', metrics_view, name='metrics'))
+
 if settings.DEBUG:
     urlpatterns += static(
         settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
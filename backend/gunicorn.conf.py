@@ -0,0 +1,34 @@
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', default='0.0.0.0:8000')
+workers = int(os.getenv(
+    'GUNICORN_WORKERS', default=multiprocessing.cpu_count() * 2 + 1
+))
+# По числу воркеров settings.py делит соединения пула с PostgreSQL.
+os.environ['GUNICORN_WORKERS'] = str(workers)
+# ASGI (воркеры uvicorn) включается явно: в замерах он пока не быстрее WSGI.
+asgi = os.getenv('GUNICORN_ASGI', default='0') == '1'
+wsgi_app = 'foodgram.asgi:application' if asgi else 'foodgram.wsgi:application'
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS',
+    default='uvicorn.workers.UvicornWorker' if asgi else 'sync'
+)
+timeout = int(os.getenv('GUNICORN_TIMEOUT', default=30))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', default=5))
+
+# Метрики воркеров пишутся в общий каталог и собираются в /metrics.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', '/tmp/foodgram-metrics'
+)
+
+
+def on_starting(server):
+    os.makedirs(metrics_dir, exist_ok=True)
+    for name in os.listdir(metrics_dir):
+        os.remove(os.path.join(metrics_dir, name))
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,24 @@
+from django.contrib import admin
+
+from .models import Job
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'status',
+        'attempts',
+        'run_at',
+        'created'
+    )
+    list_filter = (
+        'status',
+        'name'
+    )
+    search_fields = (
+        '^name',
+        'idempotency_key'
+    )
+
+
+admin.site.register(Job, JobAdmin)
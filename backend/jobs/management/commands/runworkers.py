@@ -0,0 +1,129 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from jobs.queue import claim_job, run_job, run_pending, schedule_periodic
+
+logger = logging.getLogger(__name__)
+
+
+def work(poll_interval, stop):
+    """
+    Цикл воркера: берет готовые задачи, при пустой очереди ждет.
+    Ошибка очереди (например, перезапуск БД) не завершает воркер:
+    она пишется в лог, сломанные соединения закрываются, и после
+    паузы цикл продолжается. Задача, на которой случилась ошибка,
+    вернется в очередь по истечении JOBS['LEASE'].
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    while not stop.is_set():
+        close_old_connections()
+        try:
+            job = claim_job()
+            if job is not None:
+                run_job(job)
+        except Exception:
+            logger.exception('Ошибка воркера очереди задач')
+            close_old_connections()
+            job = None
+        if job is None:
+            # Не stop.wait(): ожидающий Event процесс, убитый SIGKILL,
+            # навсегда блокирует stop.set() в остальных.
+            time.sleep(poll_interval)
+    connections.close_all()
+
+
+def start_worker(number, stop):
+    """
+    Запускает процесс воркера. Соединения с БД закрываются до fork,
+    чтобы дочерний процесс не унаследовал их сокеты.
+    """
+    connections.close_all()
+    worker = multiprocessing.Process(
+        target=work,
+        args=(settings.JOBS['POLL_INTERVAL'], stop),
+        name=f'jobs-worker-{number}'
+    )
+    worker.start()
+    return worker
+
+
+def restart_dead(workers, stop, start=start_worker):
+    """
+    Заменяет завершившиеся процессы воркеров новыми.
+    """
+    if stop.is_set():
+        return
+    for number, worker in enumerate(workers):
+        if worker.is_alive():
+            continue
+        logger.error(
+            'Воркер %s завершился с кодом %s, перезапуск',
+            worker.name, worker.exitcode
+        )
+        workers[number] = start(number, stop)
+
+
+def schedule(next_schedule):
+    """
+    Ставит периодические задачи, если подошло время; возвращает
+    момент следующей постановки. Ошибка пишется в лог, постановка
+    повторяется через JOBS['POLL_INTERVAL'].
+    """
+    if time.monotonic() < next_schedule:
+        return next_schedule
+    try:
+        wait = schedule_periodic()
+    except Exception:
+        logger.exception('Ошибка постановки периодических задач')
+        close_old_connections()
+        return next_schedule
+    return next_schedule if wait is None else time.monotonic() + wait
+
+
+class Command(BaseCommand):
+    help = 'Запускает пул процессов, выполняющих фоновые задачи.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=settings.JOBS['PROCESSES'],
+            help='Количество процессов-воркеров.'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить готовые задачи в текущем процессе и выйти.'
+        )
+
+    def handle(self, *args, **options):
+        if options['once']:
+            schedule_periodic()
+            done = run_pending()
+            self.stdout.write(f'Выполнено задач: {done}')
+            return
+
+        stop = multiprocessing.Event()
+        workers = [
+            start_worker(number, stop)
+            for number in range(options['processes'])
+        ]
+        self.stdout.write(f'Запущено воркеров: {len(workers)}')
+
+        def shutdown(signum, frame):
+            stop.set()
+
+        signal.signal(signal.SIGTERM, shutdown)
+        signal.signal(signal.SIGINT, shutdown)
+        next_schedule = 0
+        while not stop.is_set():
+            next_schedule = schedule(next_schedule)
+            restart_dead(workers, stop)
+            time.sleep(settings.JOBS['POLL_INTERVAL'])
+        for worker in workers:
+            worker.join()
@@ -0,0 +1,209 @@
+import datetime
+import logging
+import traceback
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+class Task:
+    """
+    Функция, зарегистрированная как фоновая задача.
+    Вызов task(...) выполняет ее сразу, task.delay(...) ставит в очередь.
+    """
+    def __init__(self, func, name, max_attempts=None):
+        self.func = func
+        self.name = name
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args):
+        return self.func(*args)
+
+    def delay(self, *args, idempotency_key=None, countdown=0):
+        return enqueue(
+            self.name,
+            *args,
+            idempotency_key=idempotency_key,
+            max_attempts=self.max_attempts,
+            countdown=countdown
+        )
+
+
+def task(func=None, *, name=None, max_attempts=None):
+    """
+    Декоратор регистрации задачи. Имя по умолчанию - module.function.
+    Аргументы задачи должны сериализоваться в JSON.
+    """
+    def decorator(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        registry[task_name] = Task(func, task_name, max_attempts)
+        return registry[task_name]
+    return decorator(func) if func is not None else decorator
+
+
+def enqueue(name, *args, idempotency_key=None, max_attempts=None,
+            countdown=0):
+    """
+    Ставит задачу в очередь. Задача с тем же idempotency_key повторно
+    не создается, возвращается существующая (упавшая ставится заново).
+    В режиме JOBS['EAGER'] задача сразу выполняется в текущем процессе.
+    """
+    if name not in registry:
+        raise KeyError(f'Задача {name} не зарегистрирована.')
+    if idempotency_key is not None:
+        job = Job.objects.filter(idempotency_key=idempotency_key).first()
+        if job is not None and job.status == Job.FAILED:
+            Job.objects.filter(pk=job.pk, status=Job.FAILED).update(
+                status=Job.PENDING,
+                attempts=0,
+                run_at=timezone.now()
+            )
+            job.refresh_from_db()
+        if job is not None:
+            return job
+    try:
+        with transaction.atomic():
+            job = Job.objects.create(
+                name=name,
+                args=list(args),
+                idempotency_key=idempotency_key,
+                max_attempts=max_attempts or settings.JOBS['MAX_ATTEMPTS'],
+                run_at=timezone.now() + datetime.timedelta(seconds=countdown)
+            )
+    except IntegrityError:
+        return Job.objects.get(idempotency_key=idempotency_key)
+    if settings.JOBS['EAGER']:
+        job.status = Job.RUNNING
+        job.attempts = 1
+        run_job(job)
+    return job
+
+
+def claim_job():
+    """
+    Забирает одну готовую к запуску задачу. Кандидат выбирается с
+    SKIP LOCKED (где поддерживается), а захват подтверждается условным
+    UPDATE, поэтому задачу получает только один воркер. Задачи, зависшие
+    в running дольше JOBS['LEASE'] секунд, считаются брошенными.
+    """
+    now = timezone.now()
+    stale = now - datetime.timedelta(seconds=settings.JOBS['LEASE'])
+    ready = Q(status=Job.PENDING, run_at__lte=now) | Q(
+        status=Job.RUNNING, locked_at__lt=stale
+    )
+    with transaction.atomic():
+        candidate = Job.objects.select_for_update(
+            skip_locked=True
+        ).filter(ready).order_by('run_at').values(
+            'pk', 'status', 'attempts', 'locked_at'
+        ).first()
+        if candidate is None:
+            return None
+        claimed = Job.objects.filter(
+            pk=candidate['pk'],
+            status=candidate['status'],
+            attempts=candidate['attempts'],
+            locked_at=candidate['locked_at']
+        ).update(
+            status=Job.RUNNING,
+            locked_at=now,
+            attempts=candidate['attempts'] + 1
+        )
+    if not claimed:
+        return None
+    return Job.objects.get(pk=candidate['pk'])
+
+
+def run_job(job):
+    """
+    Выполняет задачу. При ошибке задача повторяется с экспоненциальной
+    задержкой JOBS['RETRY_BACKOFF'] * 2 ** (попытка - 1), после
+    max_attempts попыток помечается как failed. В режиме EAGER
+    ошибка пробрасывается дальше.
+    """
+    try:
+        result = registry[job.name](*job.args)
+    except Exception:
+        error = traceback.format_exc()
+        logger.exception('Задача %s (id=%s) завершилась ошибкой',
+                         job.name, job.pk)
+        job.last_error = error
+        job.locked_at = None
+        if job.attempts >= job.max_attempts:
+            job.status = Job.FAILED
+        else:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + datetime.timedelta(
+                seconds=settings.JOBS['RETRY_BACKOFF'] * 2 ** (
+                    job.attempts - 1
+                )
+            )
+        job.save()
+        if settings.JOBS['EAGER']:
+            raise
+        return job
+    job.status = Job.DONE
+    job.result = result
+    job.locked_at = None
+    job.save()
+    return job
+
+
+def run_pending(limit=None):
+    """
+    Выполняет готовые задачи в текущем процессе, пока они есть.
+    """
+    done = 0
+    while limit is None or done < limit:
+        job = claim_job()
+        if job is None:
+            break
+        run_job(job)
+        done += 1
+    return done
+
+
+def prune_periodic(now=None):
+    """
+    Удаляет выполненные периодические задачи старше
+    JOBS['PERIODIC_RETENTION'] секунд: каждая ставится заново на каждый
+    интервал, и без очистки таблица Job растет бесконечно. Упавшие
+    задачи остаются для разбора.
+    """
+    border = (now or timezone.now()) - datetime.timedelta(
+        seconds=settings.JOBS['PERIODIC_RETENTION']
+    )
+    deleted, _ = Job.objects.filter(
+        status=Job.DONE,
+        idempotency_key__startswith='periodic:',
+        created__lt=border
+    ).delete()
+    return deleted
+
+
+def schedule_periodic(now=None):
+    """
+    Ставит в очередь периодические задачи JOBS['PERIODIC']
+    ({имя: интервал, с}): не больше одной на интервал, за это отвечает
+    ключ идемпотентности с номером интервала. Заодно удаляет старые
+    выполненные периодические задачи. Возвращает число секунд
+    до начала ближайшего следующего интервала.
+    """
+    now = now or timezone.now()
+    prune_periodic(now)
+    timestamp = now.timestamp()
+    wait = None
+    for name, interval in settings.JOBS['PERIODIC'].items():
+        slot = int(timestamp // interval)
+        enqueue(name, idempotency_key=f'periodic:{name}:{slot}')
+        remaining = (slot + 1) * interval - timestamp
+        wait = remaining if wait is None else min(wait, remaining)
+    return wait
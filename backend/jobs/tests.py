@@ -0,0 +1,149 @@
+import datetime
+import threading
+from unittest import mock
+
+from django.conf import settings
+from django.db import OperationalError
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from .management.commands import runworkers
+from .models import Job
+from .queue import (claim_job, enqueue, run_job, run_pending,
+                    schedule_periodic, task)
+
+calls = []
+
+
+@task(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+    return value
+
+
+@task(name='jobs.tests.tick')
+def tick():
+    calls.append('tick')
+
+
+@task(name='jobs.tests.fail', max_attempts=2)
+def fail():
+    raise RuntimeError('Ошибка задачи')
+
+
+@override_settings(JOBS={**settings.JOBS, 'EAGER': False})
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_idempotency_key(self):
+        first = record.delay(1, idempotency_key='record:1')
+        second = record.delay(1, idempotency_key='record:1')
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(calls, [1])
+
+    def test_countdown_delays_claim(self):
+        record.delay(1, countdown=60)
+        self.assertIsNone(claim_job())
+
+    def test_retry_then_failed(self):
+        fail.delay()
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            job = run_job(claim_job())
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertGreater(job.run_at, job.created)
+        Job.objects.filter(pk=job.pk).update(run_at=job.created)
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            job = run_job(claim_job())
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('Ошибка задачи', job.last_error)
+
+    def test_failed_job_is_requeued_by_key(self):
+        job = fail.delay(idempotency_key='fail')
+        Job.objects.filter(pk=job.pk).update(status=Job.FAILED, attempts=2)
+        job = fail.delay(idempotency_key='fail')
+        self.assertEqual((job.status, job.attempts), (Job.PENDING, 0))
+
+    @override_settings(JOBS={**settings.JOBS, 'EAGER': True})
+    def test_eager_runs_immediately(self):
+        job = enqueue('jobs.tests.record', 2)
+        self.assertEqual((job.status, job.result), (Job.DONE, 2))
+        self.assertEqual(calls, [2])
+
+
+@override_settings(JOBS={
+    **settings.JOBS,
+    'EAGER': False,
+    'PERIODIC': {'jobs.tests.tick': 600},
+    'PERIODIC_RETENTION': 3600,
+})
+class PeriodicTests(TestCase):
+    def setUp(self):
+        calls.clear()
+        self.now = datetime.datetime(
+            2026, 1, 1, 12, 5, tzinfo=datetime.timezone.utc
+        )
+
+    def test_one_job_per_interval(self):
+        self.assertEqual(schedule_periodic(self.now), 300)
+        schedule_periodic(self.now + datetime.timedelta(minutes=4))
+        self.assertEqual(Job.objects.count(), 1)
+        schedule_periodic(self.now + datetime.timedelta(minutes=5))
+        self.assertEqual(Job.objects.count(), 2)
+
+    def test_old_finished_jobs_are_pruned(self):
+        old = self.now - datetime.timedelta(hours=2)
+        schedule_periodic(old)
+        self.assertEqual(run_pending(), 1)
+        failed = enqueue(
+            'jobs.tests.fail', idempotency_key='periodic:jobs.tests.fail:1'
+        )
+        other = record.delay(1, idempotency_key='record:1')
+        Job.objects.filter(pk=failed.pk).update(status=Job.FAILED)
+        Job.objects.filter(pk=other.pk).update(status=Job.DONE)
+        Job.objects.update(created=old)
+        schedule_periodic(self.now)
+        slot = int(self.now.timestamp() // 600)
+        self.assertEqual(
+            set(Job.objects.values_list('idempotency_key', flat=True)),
+            {failed.idempotency_key, other.idempotency_key,
+             f'periodic:jobs.tests.tick:{slot}'}
+        )
+        self.assertEqual(calls, ['tick'])
+
+
+class WorkerTests(SimpleTestCase):
+    def test_worker_survives_queue_errors(self):
+        stop = threading.Event()
+        results = [OperationalError('server closed the connection'), None]
+
+        def claim():
+            result = results.pop(0)
+            if isinstance(result, Exception):
+                raise result
+            stop.set()
+            return result
+
+        with mock.patch.object(
+            runworkers, 'claim_job', side_effect=claim
+        ), mock.patch.object(
+            runworkers, 'close_old_connections'
+        ) as close, mock.patch.object(runworkers.signal, 'signal'):
+            with self.assertLogs(runworkers.logger, 'ERROR'):
+                runworkers.work(0, stop)
+        self.assertEqual(results, [])
+        self.assertGreaterEqual(close.call_count, 3)
+
+    def test_dead_workers_are_restarted(self):
+        alive = mock.Mock(**{'is_alive.return_value': True})
+        dead = mock.Mock(**{'is_alive.return_value': False}, exitcode=1)
+        workers = [alive, dead]
+        start = mock.Mock(return_value='new')
+        stop = threading.Event()
+        with self.assertLogs(runworkers.logger, 'ERROR'):
+            runworkers.restart_dead(workers, stop, start)
+        self.assertEqual(workers, [alive, 'new'])
+        start.assert_called_once_with(1, stop)
+        stop.set()
+        runworkers.restart_dead(workers, stop, start)
+        self.assertEqual(start.call_count, 1)
@@ -31,11 +31,15 @@ class RecipeAdmin(admin.ModelAdmin):
     )
     inlines = [IngredientInlineAdmin]
 
+    @admin.display(
+        description='Добавлений в избранное',
+        ordering='favorites_count'
+    )
     def get_count_favorite(self, obj):
         """
-        Метод для подсчета количества добавлений в избранное рецепта.
+        Количество добавлений рецепта в избранное (поддерживаемый счетчик).
         """
-        return obj.favorite_recipe.count()
+        return obj.favorites_count
 
 
 class IngredientAdmin(admin.ModelAdmin):
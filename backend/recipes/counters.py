@@ -0,0 +1,42 @@
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Favorite, Purchase, Recipe
+
+User = get_user_model()
+
+
+def change_counter(model, pk, field, delta):
+    """
+    Атомарно меняет счетчик на delta через F() без чтения строки.
+    Уменьшение не опускает счетчик ниже нуля.
+    """
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{field}__gte': -delta})
+    return queryset.update(**{field: F(field) + delta})
+
+
+def count_subquery(model, field):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        0
+    )
+
+
+def rebuild_counters():
+    """
+    Пересчитывает все денормализованные счетчики по исходным таблицам.
+    """
+    Recipe.objects.update(
+        favorites_count=count_subquery(Favorite, 'recipe'),
+        purchases_count=count_subquery(Purchase, 'recipe')
+    )
+    User.objects.update(recipes_count=count_subquery(Recipe, 'author'))
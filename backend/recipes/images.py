@@ -0,0 +1,75 @@
+import io
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+
+def get_variant_format():
+    """
+    Формат копий из настроек; если Pillow не умеет его сохранять
+    (например, AVIF без плагина), используется WebP.
+    """
+    image_format = settings.RECIPE_IMAGE['FORMAT'].upper()
+    Image.init()
+    return image_format if image_format in Image.SAVE else 'WEBP'
+
+
+def get_variant_name(name, variant, image_format):
+    directory, filename = os.path.split(name)
+    base, _ = os.path.splitext(filename)
+    return os.path.join(
+        directory, 'variants', f'{base}_{variant}.{image_format.lower()}'
+    )
+
+
+def render_variant(image, size, image_format):
+    variant = image.copy()
+    if image_format == 'JPEG':
+        variant = variant.convert('RGB')
+    variant.thumbnail(size, Image.LANCZOS)
+    buffer = io.BytesIO()
+    variant.save(
+        buffer,
+        format=image_format,
+        quality=settings.RECIPE_IMAGE['QUALITY']
+    )
+    return buffer.getvalue()
+
+
+def build_image_variants(recipe_id):
+    """
+    Создает уменьшенные копии картинки рецепта рядом с оригиналом
+    и записывает их пути в Recipe.image_variants. Если картинка рецепта
+    за это время сменилась, результат не сохраняется.
+    """
+    recipe = Recipe.objects.filter(pk=recipe_id).only(
+        'image', 'image_variants'
+    ).first()
+    if recipe is None or not recipe.image:
+        return None
+    name = recipe.image.name
+    image_format = get_variant_format()
+    with default_storage.open(name, 'rb') as original:
+        image = ImageOps.exif_transpose(Image.open(original))
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+    variants = {}
+    for variant, size in settings.RECIPE_IMAGE['VARIANTS'].items():
+        variant_name = get_variant_name(name, variant, image_format)
+        if default_storage.exists(variant_name):
+            default_storage.delete(variant_name)
+        variants[variant] = default_storage.save(
+            variant_name,
+            ContentFile(render_variant(image, size, image_format))
+        )
+    updated = Recipe.objects.filter(pk=recipe_id, image=name).update(
+        image_variants=variants
+    )
+    stale = set(recipe.image_variants.values()) - set(variants.values())
+    for variant_name in stale if updated else variants.values():
+        default_storage.delete(variant_name)
+    return variants if updated else None
@@ -0,0 +1,53 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from recipes.reference_data import (DEFAULT_FILES, REFERENCES,
+                                    ReferenceDataError, get_reference,
+                                    load_reference)
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает справочники ингредиентов и тегов из CSV/JSON. '
+        'Существующие записи обновляются по естественному ключу, '
+        'поэтому команду можно запускать повторно.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths',
+            nargs='*',
+            help='Файлы CSV или JSON, по умолчанию data/ingredients.csv '
+                 'и data/tag.json.'
+        )
+        parser.add_argument(
+            '--reference',
+            choices=REFERENCES,
+            help='Справочник, если его нельзя понять по имени файла.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество строк в одной пачке.'
+        )
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or [
+            os.path.join(settings.BASE_DIR, path) for path in DEFAULT_FILES
+        ]
+        for path in paths:
+            try:
+                stats = load_reference(
+                    path,
+                    get_reference(path, options['reference']),
+                    options['batch_size']
+                )
+            except (OSError, ReferenceDataError) as error:
+                raise CommandError(f'{path}: {error}')
+            self.stdout.write(
+                f'{path}: добавлено {stats["inserted"]}, '
+                f'обновлено {stats["updated"]}, '
+                f'пропущено {stats["skipped"]}'
+            )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.counters import rebuild_counters
+from recipes.tasks import rebuild_recipe_counters
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает счетчики избранного, списков покупок '
+        'и рецептов авторов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Поставить пересчет в очередь фоновых задач.'
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = rebuild_recipe_counters.delay()
+            self.stdout.write(f'Задача {job.pk} поставлена в очередь.')
+            return
+        with transaction.atomic():
+            rebuild_counters()
+        self.stdout.write(self.style.SUCCESS('Счетчики пересчитаны.'))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from recipes.tasks import rebuild_trending_scores
+from recipes.trending import rebuild_scores
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рейтинги популярности рецептов по датам '
+        'добавления в избранное и список покупок.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--enqueue',
+            action='store_true',
+            help='Поставить пересчет в очередь фоновых задач.'
+        )
+
+    def handle(self, *args, **options):
+        if options['enqueue']:
+            job = rebuild_trending_scores.delay()
+            self.stdout.write(f'Задача {job.pk} поставлена в очередь.')
+            return
+        with transaction.atomic():
+            rebuild_scores()
+        self.stdout.write(self.style.SUCCESS('Рейтинги пересчитаны.'))
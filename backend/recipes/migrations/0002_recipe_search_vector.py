@@ -0,0 +1,90 @@
+# Generated by Django 3.2.16 on 2026-10-18 18:30
+
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import DatabaseError, migrations, transaction
+
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector({config}, coalesce({row}name, '')), 'A') || "
+    "setweight(to_tsvector({config}, coalesce({row}text, '')), 'B')"
+)
+
+
+def get_search_vector_sql(schema_editor, row):
+    """
+    Конфигурация берется из RECIPE_SEARCH['CONFIG'], как и в SearchQuery:
+    вектор и запрос должны разбираться одним словарем.
+    """
+    return SEARCH_VECTOR_SQL.format(
+        config=schema_editor.quote_value(settings.RECIPE_SEARCH['CONFIG']),
+        row=row
+    )
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Триггер, поддерживающий search_vector, GIN-индекс по нему и
+    триграммный индекс по названию (если pg_trgm удалось установить).
+    На других СУБД ничего не делает.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE OR REPLACE FUNCTION recipe_search_vector_update() '
+        'RETURNS trigger AS $$ BEGIN '
+        'NEW.search_vector := ' + get_search_vector_sql(schema_editor, 'NEW.')
+        + '; RETURN NEW; END $$ LANGUAGE plpgsql;'
+    )
+    schema_editor.execute(
+        'CREATE TRIGGER recipe_search_vector_trigger '
+        'BEFORE INSERT OR UPDATE OF name, text ON "Recipe" '
+        'FOR EACH ROW EXECUTE PROCEDURE recipe_search_vector_update();'
+    )
+    schema_editor.execute(
+        'UPDATE "Recipe" SET search_vector = '
+        + get_search_vector_sql(schema_editor, '') + ';'
+    )
+    schema_editor.execute(
+        'CREATE INDEX recipe_search_vector_idx ON "Recipe" '
+        'USING gin (search_vector);'
+    )
+    try:
+        # Без прав на CREATE EXTENSION поиск работает без триграмм
+        # (RECIPE_SEARCH['TRIGRAM'] по умолчанию смотрит на pg_extension).
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm;')
+    except DatabaseError:
+        return
+    schema_editor.execute(
+        'CREATE INDEX recipe_name_trgm_idx ON "Recipe" '
+        'USING gin (name gin_trgm_ops);'
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_name_trgm_idx;')
+    schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx;')
+    schema_editor.execute(
+        'DROP TRIGGER IF EXISTS recipe_search_vector_trigger ON "Recipe";'
+    )
+    schema_editor.execute(
+        'DROP FUNCTION IF EXISTS recipe_search_vector_update();'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:05
+
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """
+    Повторные запуски test_data.py создавали дубли ингредиентов.
+    Ссылки рецептов переносятся на первую запись, дубли удаляются.
+    """
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    RecipeIngredient = apps.get_model('recipes', 'RecipeIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        keep=Min('id'), total=Count('id')
+    ).filter(total__gt=1)
+    for group in duplicates.iterator():
+        extra = Ingredient.objects.filter(
+            name=group['name'],
+            measurement_unit=group['measurement_unit']
+        ).exclude(pk=group['keep']).values_list('pk', flat=True)
+        for ingredient_id in list(extra):
+            RecipeIngredient.objects.filter(
+                ingredient_id=ingredient_id,
+                recipe__in=RecipeIngredient.objects.filter(
+                    ingredient_id=group['keep']
+                ).values('recipe')
+            ).delete()
+            RecipeIngredient.objects.filter(
+                ingredient_id=ingredient_id
+            ).update(ingredient_id=group['keep'])
+            Ingredient.objects.filter(pk=ingredient_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0005_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+    ]
@@ -0,0 +1,84 @@
+# Generated by Django 3.2.16 on 2026-10-18 19:18
+
+import datetime
+import math
+from collections import defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+# Параметры рейтинга на момент миграции.
+HALF_LIFE = 24 * 60 * 60
+DECAY_INTERVAL = 10 * 60
+WEIGHTS = {'Favorite': 1.0, 'Purchase': 2.0}
+MIN_SCORE = 0.01
+
+
+def fill_scores(apps, schema_editor):
+    now = django.utils.timezone.now()
+    seconds = now.timestamp()
+    decayed_at = datetime.datetime.fromtimestamp(
+        seconds - seconds % DECAY_INTERVAL, tz=datetime.timezone.utc
+    )
+    horizon = now - datetime.timedelta(
+        seconds=HALF_LIFE * math.log2(max(WEIGHTS.values()) / MIN_SCORE)
+    )
+    scores = defaultdict(float)
+    for name, weight in WEIGHTS.items():
+        events = apps.get_model('recipes', name).objects.filter(
+            created__gte=horizon
+        ).order_by()
+        for recipe_id, created in events.values_list(
+            'recipe_id', 'created'
+        ).iterator():
+            scores[recipe_id] += weight * 0.5 ** (
+                (decayed_at - created).total_seconds() / HALF_LIFE
+            )
+    model = apps.get_model('recipes', 'RecipeScore')
+    model.objects.bulk_create(
+        (
+            model(recipe_id=recipe_id, score=score, decayed_at=decayed_at)
+            for recipe_id, score in scores.items()
+            if score >= MIN_SCORE
+        ),
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeScore',
+            fields=[
+                ('recipe', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trending_score', serialize=False, to='recipes.recipe', verbose_name='Рецепт')),
+                ('score', models.FloatField(default=0, verbose_name='Рейтинг')),
+                ('decayed_at', models.DateTimeField(verbose_name='Рейтинг приведен к')),
+            ],
+            options={
+                'verbose_name': 'Рейтинг рецепта',
+                'verbose_name_plural': 'Рейтинги рецептов',
+                'db_table': 'RecipeScore',
+            },
+        ),
+        migrations.AddField(
+            model_name='favorite',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата добавления'),
+        ),
+        migrations.AddField(
+            model_name='purchase',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='Дата добавления'),
+        ),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(fields=['-score'], name='recipe_score_idx'),
+        ),
+        migrations.RunPython(fill_scores, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.search import SearchVectorField
 from django.core import validators
 from django.db import models
+from django.utils import timezone
 
 User = get_user_model()
 
@@ -52,6 +54,12 @@ class Ingredient(models.Model):
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
         db_table = 'Ingredient'
+        constraints = (
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient_name_unit',
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -65,7 +73,8 @@ class Recipe(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='recipe_author',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     tags = models.ManyToManyField(
         Tag,
@@ -84,6 +93,12 @@ class Recipe(models.Model):
         verbose_name='Картинка',
         upload_to='recipe/'
     )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии картинки',
+        default=dict,
+        blank=True,
+        editable=False
+    )
     text = models.TextField('Описание')
     cooking_time = models.PositiveSmallIntegerField(
         verbose_name='Время приготовления, мин.',
@@ -98,12 +113,37 @@ class Recipe(models.Model):
         verbose_name='Время создания',
         auto_now_add=True
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False
+    )
+    purchases_count = models.PositiveIntegerField(
+        verbose_name='Количество добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый вектор',
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ('-pub_date',)
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         db_table = 'Recipe'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+        )
 
     def __str__(self):
         return self.name
@@ -118,7 +158,8 @@ class RecipeIngredient(models.Model):
         Recipe,
         on_delete=models.CASCADE,
         related_name='recipe_ingredient',
-        verbose_name='Рецепт'
+        verbose_name='Рецепт',
+        db_index=False
     )
     ingredient = models.ForeignKey(
         Ingredient,
@@ -144,6 +185,13 @@ class RecipeIngredient(models.Model):
                 name='unique_recipe_ingredient',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe',),
+                include=('ingredient', 'amount'),
+                name='recipe_ingredient_amount_idx'
+            ),
+        )
 
     def __str__(self):
         return f'{self.recipe}: {self.ingredient} - {self.amount}'
@@ -157,13 +205,20 @@ class Favorite(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='favorite_user',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='favorite_recipe',
-        verbose_name='Рецепт'
+        verbose_name='Рецепт',
+        db_index=False
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now,
+        editable=False
     )
 
     class Meta:
@@ -177,6 +232,13 @@ class Favorite(models.Model):
                 name='unique_favorite',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe',),
+                include=('user',),
+                name='favorite_recipe_user_idx'
+            ),
+        )
 
     def __str__(self):
         return f'Избранное: {self.user} - {self.recipe}'
@@ -190,13 +252,20 @@ class Purchase(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='purchase_user',
-        verbose_name='Автор'
+        verbose_name='Автор',
+        db_index=False
     )
     recipe = models.ForeignKey(
         Recipe,
         on_delete=models.CASCADE,
         related_name='purchase_recipe',
-        verbose_name='Рецепт'
+        verbose_name='Рецепт',
+        db_index=False
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        default=timezone.now,
+        editable=False
     )
 
     def __str__(self):
@@ -212,3 +281,46 @@ class Purchase(models.Model):
                 name='unique_purchase',
             ),
         )
+        indexes = (
+            models.Index(
+                fields=('recipe',),
+                include=('user',),
+                name='purchase_recipe_user_idx'
+            ),
+        )
+
+
+class RecipeScore(models.Model):
+    """
+    Рейтинг популярности рецепта: сумма весов добавлений в избранное
+    и список покупок, затухающая с периодом полураспада
+    TRENDING['HALF_LIFE']. Значение приведено к моменту decayed_at.
+    """
+    recipe = models.OneToOneField(
+        Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='trending_score',
+        verbose_name='Рецепт'
+    )
+    score = models.FloatField(
+        verbose_name='Рейтинг',
+        default=0
+    )
+    decayed_at = models.DateTimeField(
+        verbose_name='Рейтинг приведен к'
+    )
+
+    class Meta:
+        verbose_name = 'Рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        db_table = 'RecipeScore'
+        indexes = (
+            models.Index(
+                fields=('-score',),
+                name='recipe_score_idx'
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe}: {self.score:.2f}'
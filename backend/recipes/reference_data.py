@@ -0,0 +1,209 @@
+import csv
+import json
+import os
+import re
+
+from django.db import IntegrityError, transaction
+from django.dispatch import Signal
+
+from .models import Ingredient, Tag
+
+DEFAULT_FILES = ('data/ingredients.csv', 'data/tag.json')
+CHUNK_SIZE = 64 * 1024
+SEPARATORS = re.compile(r'[\s,]*')
+
+# bulk_create и bulk_update не шлют post_save, поэтому об изменении
+# справочника пачкой сообщается отдельно (сбрасываются кеши справочников).
+reference_rows_changed = Signal()
+
+REFERENCES = {
+    'ingredients': {
+        'model': Ingredient,
+        'fields': ('name', 'measurement_unit'),
+        'key': ('name', 'measurement_unit'),
+    },
+    'tags': {
+        'model': Tag,
+        'fields': ('name', 'color', 'slug'),
+        'key': ('slug',),
+    },
+}
+
+
+class ReferenceDataError(Exception):
+    pass
+
+
+def read_json(file):
+    """
+    Потоково читает JSON-массив объектов: в памяти держится
+    только текущий кусок файла. Отдает пары (номер строки, объект).
+    """
+    decoder = json.JSONDecoder()
+    chunk = file.read(CHUNK_SIZE)
+    buffer = chunk.lstrip()
+    line = chunk.count('\n', 0, len(chunk) - len(buffer)) + 1
+    if not buffer.startswith('['):
+        raise ReferenceDataError('Ожидается JSON-массив.')
+    position = 1
+    while True:
+        position = SEPARATORS.match(buffer, position).end()
+        if buffer.startswith(']', position):
+            return
+        try:
+            row, end = decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            chunk = file.read(CHUNK_SIZE)
+            if not chunk:
+                raise ReferenceDataError('Некорректный JSON.')
+            line += buffer.count('\n', 0, position)
+            buffer = buffer[position:] + chunk
+            position = 0
+            continue
+        yield line + buffer.count('\n', 0, position), row
+        position = end
+
+
+def read_csv(file, fields):
+    """
+    Строки CSV в порядке полей справочника, строка заголовка
+    с названиями полей пропускается. Отдает пары (номер строки, строка).
+    """
+    reader = csv.reader(file)
+    line = 1
+    for row in reader:
+        if row and tuple(row) != fields:
+            yield line, dict(zip(fields, row))
+        line = reader.line_num + 1
+
+
+def read_rows(path, fields):
+    with open(path, encoding='utf-8') as file:
+        if os.path.splitext(path)[1].lower() == '.csv':
+            yield from read_csv(file, fields)
+        else:
+            yield from read_json(file)
+
+
+def get_reference(path, name=None):
+    """
+    Справочник по явному имени или по имени файла
+    (ingredients.csv, tag.json).
+    """
+    if name is None:
+        stem = os.path.splitext(os.path.basename(path))[0].lower()
+        name = next(
+            (
+                reference for reference in REFERENCES
+                if reference.startswith(stem) or stem.startswith(reference)
+            ),
+            None
+        )
+    if name not in REFERENCES:
+        raise ReferenceDataError(
+            f'Не удалось определить справочник для {path}.'
+        )
+    return REFERENCES[name]
+
+
+def clean_row(row, fields, key):
+    values = {field: str(row.get(field) or '').strip() for field in fields}
+    if not all(values[field] for field in key):
+        return None
+    return values
+
+
+def find_conflict(objects):
+    """
+    Сохраняет записи пачки по одной, пока одна из них не нарушит
+    ограничение уникальности, и откатывает все сохраненное.
+    Возвращает текст ошибки с номером строки этой записи.
+    """
+    with transaction.atomic():
+        try:
+            for line, obj in sorted(objects, key=lambda item: item[0]):
+                try:
+                    with transaction.atomic():
+                        obj.save()
+                except IntegrityError as error:
+                    return f'строка {line}: {error}'
+        finally:
+            transaction.set_rollback(True)
+    return None
+
+
+def upsert_batch(reference, rows, lines):
+    """
+    Добавляет новые записи и обновляет изменившиеся по естественному
+    ключу, lines - номера строк файла по ключу. Возвращает
+    (добавлено, обновлено, без изменений).
+    """
+    model, key = reference['model'], reference['key']
+    other_fields = [
+        field for field in reference['fields'] if field not in key
+    ]
+    existing = {
+        tuple(getattr(obj, field) for field in key): obj
+        for obj in model.objects.filter(**{
+            f'{key[0]}__in': {row[key[0]] for row in rows.values()}
+        })
+    }
+    new, changed, objects = [], [], []
+    for row_key, row in rows.items():
+        obj = existing.get(row_key)
+        if obj is None:
+            new.append(model(**row))
+            objects.append((lines[row_key], new[-1]))
+            continue
+        if any(getattr(obj, field) != row[field] for field in other_fields):
+            for field in other_fields:
+                setattr(obj, field, row[field])
+            changed.append(obj)
+            objects.append((lines[row_key], obj))
+    try:
+        with transaction.atomic():
+            model.objects.bulk_create(new)
+            if changed:
+                model.objects.bulk_update(changed, other_fields)
+    except IntegrityError as error:
+        raise ReferenceDataError(find_conflict(objects) or str(error))
+    if new or changed:
+        reference_rows_changed.send(sender=model)
+    return len(new), len(changed), len(rows) - len(new) - len(changed)
+
+
+def load_reference(path, reference, batch_size=1000):
+    """
+    Загружает файл пачками по batch_size строк. Пустые и повторяющиеся
+    внутри пачки строки считаются пропущенными. Повторная загрузка
+    того же файла ничего не меняет. Строка, которая нарушает
+    уникальность другого поля (например, цвета тега), останавливает
+    загрузку с ReferenceDataError и номером строки.
+    """
+    stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+    batch, lines = {}, {}
+
+    def flush():
+        inserted, updated, unchanged = upsert_batch(reference, batch, lines)
+        stats['inserted'] += inserted
+        stats['updated'] += updated
+        stats['skipped'] += unchanged
+        batch.clear()
+        lines.clear()
+
+    for line, row in read_rows(path, reference['fields']):
+        row = clean_row(row, reference['fields'], reference['key'])
+        if row is None:
+            stats['skipped'] += 1
+            continue
+        row_key = tuple(row[field] for field in reference['key'])
+        if row_key in batch:
+            stats['skipped'] += 1
+            continue
+        batch[row_key] = row
+        lines[row_key] = line
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return stats
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .counters import change_counter
+from .models import Favorite, Purchase, Recipe
+from .trending import change_score, event_weight
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+        change_score(
+            instance.recipe_id, event_weight(sender), instance.created
+        )
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+    change_score(
+        instance.recipe_id, -event_weight(sender), instance.created
+    )
+
+
+@receiver(post_save, sender=Purchase)
+def purchase_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(Recipe, instance.recipe_id, 'purchases_count', 1)
+        change_score(
+            instance.recipe_id, event_weight(sender), instance.created
+        )
+
+
+@receiver(post_delete, sender=Purchase)
+def purchase_deleted(sender, instance, **kwargs):
+    change_counter(Recipe, instance.recipe_id, 'purchases_count', -1)
+    change_score(
+        instance.recipe_id, -event_weight(sender), instance.created
+    )
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(User, instance.author_id, 'recipes_count', 1)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    change_counter(User, instance.author_id, 'recipes_count', -1)
@@ -0,0 +1,36 @@
+from jobs.queue import task
+
+from .counters import rebuild_counters
+from .images import build_image_variants
+from .trending import decay_scores, rebuild_scores
+
+
+@task(name='recipes.build_image_variants')
+def build_recipe_image_variants(recipe_id):
+    return build_image_variants(recipe_id)
+
+
+@task(name='recipes.rebuild_counters', max_attempts=1)
+def rebuild_recipe_counters():
+    rebuild_counters()
+
+
+@task(name='recipes.decay_trending_scores', max_attempts=1)
+def decay_trending_scores():
+    return decay_scores()
+
+
+@task(name='recipes.rebuild_trending_scores', max_attempts=1)
+def rebuild_trending_scores():
+    rebuild_scores()
+
+
+def schedule_image_variants(recipe):
+    """
+    Ставит обработку картинки рецепта в очередь фоновых задач.
+    Ключ идемпотентности исключает повторную обработку той же картинки.
+    """
+    return build_recipe_image_variants.delay(
+        recipe.pk,
+        idempotency_key=f'image-variants:{recipe.pk}:{recipe.image.name}'
+    )
@@ -0,0 +1,128 @@
+import datetime
+import math
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import Favorite, Purchase, RecipeScore
+
+
+def get_slot(moment):
+    """
+    Начало интервала затухания TRENDING['DECAY_INTERVAL'],
+    в который попадает moment.
+    """
+    interval = settings.TRENDING['DECAY_INTERVAL']
+    seconds = moment.timestamp()
+    return datetime.datetime.fromtimestamp(
+        seconds - seconds % interval, tz=datetime.timezone.utc
+    )
+
+
+def decay(seconds):
+    return 0.5 ** (seconds / settings.TRENDING['HALF_LIFE'])
+
+
+def weight_at(weight, moment, decayed_at):
+    """
+    Вклад события moment с весом weight в рейтинг, приведенный
+    к моменту decayed_at.
+    """
+    return weight * decay((decayed_at - moment).total_seconds())
+
+
+def change_score(recipe_id, weight, moment):
+    """
+    Добавляет в рейтинг рецепта событие moment с весом weight
+    (отрицательный вес убирает событие). Строка обновляется условно
+    по decayed_at, поэтому одновременное затухание не теряет вклад:
+    обновление повторяется с новым decayed_at.
+    """
+    scores = RecipeScore.objects.filter(recipe_id=recipe_id)
+    while True:
+        decayed_at = scores.values_list('decayed_at', flat=True).first()
+        if decayed_at is None:
+            if weight < 0:
+                return
+            decayed_at = get_slot(timezone.now())
+            try:
+                with transaction.atomic():
+                    RecipeScore.objects.create(
+                        recipe_id=recipe_id,
+                        score=weight_at(weight, moment, decayed_at),
+                        decayed_at=decayed_at
+                    )
+                return
+            except IntegrityError:
+                continue
+        if scores.filter(decayed_at=decayed_at).update(
+            score=Greatest(
+                F('score') + weight_at(weight, moment, decayed_at),
+                Value(0.0, output_field=FloatField())
+            )
+        ):
+            return
+
+
+def event_weight(model):
+    return settings.TRENDING['WEIGHTS'][model._meta.model_name]
+
+
+def decay_scores():
+    """
+    Приводит рейтинги к началу текущего интервала затухания: одно
+    обновление на каждое значение decayed_at (обычно одно), затем
+    удаляет рейтинги ниже TRENDING['MIN_SCORE'].
+    """
+    target = get_slot(timezone.now())
+    stale = RecipeScore.objects.filter(
+        decayed_at__lt=target
+    ).order_by().values_list('decayed_at', flat=True).distinct()
+    for decayed_at in list(stale):
+        RecipeScore.objects.filter(decayed_at=decayed_at).update(
+            score=F('score') * decay((target - decayed_at).total_seconds()),
+            decayed_at=target
+        )
+    deleted, _ = RecipeScore.objects.filter(
+        score__lt=settings.TRENDING['MIN_SCORE']
+    ).delete()
+    return {'decayed_at': target.isoformat(), 'deleted': deleted}
+
+
+def rebuild_scores():
+    """
+    Пересчитывает рейтинги по датам добавления в избранное и список
+    покупок. События старше срока, за который наибольший вес падает
+    ниже TRENDING['MIN_SCORE'], не читаются.
+    """
+    config = settings.TRENDING
+    now = timezone.now()
+    decayed_at = get_slot(now)
+    horizon = now - datetime.timedelta(
+        seconds=config['HALF_LIFE'] * math.log2(
+            max(config['WEIGHTS'].values()) / config['MIN_SCORE']
+        )
+    )
+    scores = defaultdict(float)
+    for model in (Favorite, Purchase):
+        weight = event_weight(model)
+        events = model.objects.filter(created__gte=horizon).order_by()
+        for recipe_id, created in events.values_list(
+            'recipe_id', 'created'
+        ).iterator():
+            scores[recipe_id] += weight_at(weight, created, decayed_at)
+    RecipeScore.objects.all().delete()
+    RecipeScore.objects.bulk_create(
+        (
+            RecipeScore(
+                recipe_id=recipe_id, score=score, decayed_at=decayed_at
+            )
+            for recipe_id, score in scores.items()
+            if score >= config['MIN_SCORE']
+        ),
+        batch_size=1000
+    )